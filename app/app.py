@@ -1,10 +1,14 @@
 import os
 import json
 import sys
+import copy
+import hashlib
+import asyncio
 import datetime
+import logging
+import traceback
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
 from openai import OpenAI
 
@@ -17,6 +21,8 @@ from src.testing import conversation_simulator
 from src.metrics import performance_evaluator
 from src.correction import script_improver
 
+logger = logging.getLogger(__name__)
+
 # Set page config
 st.set_page_config(
     page_title="Self-Correcting Debt Collection Voice Agent",
@@ -24,9 +30,25 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_openai_client(api_key_fingerprint):
+    """
+    Shared OpenAI client for the app lifetime, so httpx connection pooling
+    applies across turns instead of paying a TLS handshake per request.
+
+    Keyed on a fingerprint of the API key so pasting a new key rebuilds it.
+    """
+    return OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+
+@st.cache_resource
+def _load_base_script():
+    """Load and parse the base script once per process, shared across sessions."""
+    return debt_collection_agent.load_base_script()
+
 # Initialize session state
 if "current_script" not in st.session_state:
-    st.session_state.current_script = debt_collection_agent.load_base_script()
+    # Deep-copy so per-session script improvements don't mutate the shared cache
+    st.session_state.current_script = copy.deepcopy(_load_base_script())
 if "iteration_history" not in st.session_state:
     st.session_state.iteration_history = []
 if "latest_metrics" not in st.session_state:
@@ -35,35 +57,34 @@ if "latest_feedback" not in st.session_state:
     st.session_state.latest_feedback = None
 if "test_conversations" not in st.session_state:
     st.session_state.test_conversations = []
-if "realtime_conv_container" not in st.session_state:
-    st.session_state.realtime_conv_container = None
-if "current_tab" not in st.session_state:
-    st.session_state.current_tab = 0  # Default to first tab
+if "pending_batches" not in st.session_state:
+    st.session_state.pending_batches = []
 
 # Main header
 st.title("🤖 Self-Correcting Debt Collection Voice Agent System")
 
+@st.cache_data(show_spinner=False, max_entries=256)
+def _cached_simulation_batch(script_version, script_prompt, personas_json, max_turns, _script, _personas):
+    """
+    Run a batch of simulated conversations concurrently, cached on the script
+    version/prompt and the serialized personas.
+
+    Repeated "Run Test Iteration" clicks with an unchanged script and personas
+    hit the cache and skip the OpenAI calls entirely. Arguments prefixed with
+    an underscore are excluded from the cache key.
+    """
+    # max_concurrent bounds in-flight conversations to stay within OpenAI
+    # rate limits
+    return asyncio.run(conversation_simulator.simulate_batch(
+        [(_script, persona) for persona in _personas],
+        max_turns=max_turns,
+        max_concurrent=5
+    ))
+
 # Main content area with tabs - define tabs first before they're referenced in button handlers
 tab_labels = ["Current Script", "Test Results", "Improvement History", "Conversations", "Live Conversation"]
 tab1, tab2, tab3, tab4, tab5 = st.tabs(tab_labels)
 
-# Auto-select the tab based on session state
-if st.session_state.current_tab != 0:
-    selected_tab = st.session_state.current_tab
-    # Reset to default after use
-    st.session_state.current_tab = 0
-    # This JavaScript auto-clicks the selected tab
-    tab_index = selected_tab  # 0-based index
-    st.markdown(f"""
-    <script>
-        document.addEventListener('DOMContentLoaded', function() {{
-            setTimeout(function() {{
-                document.querySelectorAll('button[data-baseweb="tab"]')[{tab_index}].click();
-            }}, 100);
-        }});
-    </script>
-    """, unsafe_allow_html=True)
-
 # Sidebar with controls
 with st.sidebar:
     st.header("Controls")
@@ -77,10 +98,15 @@ with st.sidebar:
     else:
         api_key_provided = False
         st.warning("⚠️ Please enter your OpenAI API key to use the system")
+
+    # Developer mode surfaces full tracebacks in the UI on errors
+    st.session_state.debug = st.toggle("Developer mode", value=False)
     
     # Settings
     st.subheader("Test Settings")
     num_personas = st.slider("Number of Test Personas", min_value=1, max_value=10, value=3)
+    batch_feedback = st.checkbox("Batch API feedback (50% cheaper, slower)", value=False,
+                                help="Route improvement feedback through the OpenAI Batch API; results arrive within 24h")
     
     # Metrics thresholds
     st.subheader("Quality Thresholds")
@@ -94,9 +120,6 @@ with st.sidebar:
     # Run buttons
     if st.button("🧪 Run Test Iteration", disabled=not api_key_provided):
         try:
-            # Set current tab to Conversations (index 3)
-            st.session_state.current_tab = 3
-            
             # Create a placeholder for real-time updates
             progress_placeholder = st.empty()
             progress_placeholder.info("Starting test iteration...")
@@ -106,47 +129,21 @@ with st.sidebar:
             personas = persona_generator.generate_personas(count=num_personas)
             progress_placeholder.success(f"Generated {len(personas)} test personas")
             
-            # Run simulated conversations
-            test_conversations = []
-            
-            # Clear existing conversations and display new ones in the Conversations tab
-            with tab4:
-                st.session_state.realtime_conv_container = st.container()
-            
-            for i, persona in enumerate(personas, 1):
-                progress_placeholder.info(f"Simulating conversation {i}/{len(personas)} with {persona.name}...")
-                
-                # Display persona details in the Conversations tab
-                with tab4:
-                    with st.session_state.realtime_conv_container:
-                        st.subheader(f"Conversation with {persona.name}")
-                        st.write(f"Age: {persona.age}, Occupation: {persona.occupation}")
-                        st.write(f"Debt Amount: ${persona.debt_amount:.2f}, Months Behind: {persona.months_behind}")
-                        st.write(f"Willingness to Pay: {int(persona.willingness_to_pay * 100)}%")
-                        
-                        # Create a placeholder for conversation messages
-                        msg_placeholder = st.empty()
-                        messages_area = msg_placeholder.container()
-                        
-                        # Create a callback function to update UI with each message
-                        def message_callback(role, content):
-                            with messages_area:
-                                if role == "agent":
-                                    st.markdown(f"**Agent:** {content}")
-                                else:
-                                    st.markdown(f"**Customer:** {content}")
-                        
-                        # Pass the callback to conversation simulator
-                        conversation = conversation_simulator.simulate_conversation(
-                            agent_script=st.session_state.current_script,
-                            customer_persona=persona,
-                            max_turns=15,
-                            message_callback=message_callback  # Pass the callback function
-                        )
-                        
-                        test_conversations.append(conversation)
-                        st.markdown("---")  # Add separator between conversations
-            
+            # Run all simulated conversations concurrently. The batch runs
+            # synchronously inside this handler; the Conversations tab
+            # renders the results later in this same script run, once
+            # test_conversations lands in session state.
+            progress_placeholder.info(f"Simulating {len(personas)} conversations concurrently...")
+            personas_json = json.dumps([p.model_dump() for p in personas], sort_keys=True)
+            test_conversations = _cached_simulation_batch(
+                st.session_state.current_script.version,
+                st.session_state.current_script.to_prompt(),
+                personas_json,
+                15,
+                st.session_state.current_script,
+                personas
+            )
+
             # Evaluate performance
             progress_placeholder.info("Evaluating performance metrics...")
             metrics = performance_evaluator.evaluate_conversations(test_conversations)
@@ -154,8 +151,10 @@ with st.sidebar:
             # Generate improvement feedback
             progress_placeholder.info("Generating improvement feedback...")
             feedback = performance_evaluator.generate_improvement_feedback(
-                test_conversations, metrics
+                test_conversations, metrics, batch_mode=batch_feedback
             )
+            if feedback.get("batch_id"):
+                st.session_state.pending_batches.append(feedback["batch_id"])
             
             # Update session state
             st.session_state.latest_metrics = metrics
@@ -170,18 +169,20 @@ with st.sidebar:
                 "feedback_summary": feedback.get("general_feedback", "")[:100] + "..."
             }
             st.session_state.iteration_history.append(history_entry)
-            
-            # Reset the realtime container so conversations appear in the expanders next time
-            st.session_state.realtime_conv_container = None
-            
+
+            # Persist the whole iteration as one Parquet file instead of
+            # one JSON file per conversation
+            conversation_simulator.save_batch(test_conversations)
+
             progress_placeholder.success("Test iteration completed successfully!")
             
             # Switch to the Test Results tab to show metrics
             tab2.write("Test completed! Check the 'Conversations' tab to see all conversations.")
         except Exception as e:
+            logger.exception("Error during test iteration")
             st.error(f"Error during test iteration: {str(e)}")
-            import traceback
-            st.exception(f"Detailed error: {traceback.format_exc()}")
+            if st.session_state.get("debug"):
+                st.exception(f"Detailed error: {traceback.format_exc()}")
     
     if st.button("🔄 Improve Script", disabled=not api_key_provided):
         if st.session_state.latest_feedback:
@@ -195,11 +196,16 @@ with st.sidebar:
                     
                     # Update current script
                     st.session_state.current_script = improved_script
+                    # The live-conversation chain carries the old script's
+                    # system prefix server-side; drop it so the next turn
+                    # resends the prefix built from the new script
+                    st.session_state.last_response_id = None
                     st.success(f"Script improved to version {improved_script.version}")
             except Exception as e:
+                logger.exception("Error during script improvement")
                 st.error(f"Error during script improvement: {str(e)}")
-                import traceback
-                st.exception(f"Detailed error: {traceback.format_exc()}")
+                if st.session_state.get("debug"):
+                    st.exception(f"Detailed error: {traceback.format_exc()}")
         else:
             st.error("Run a test iteration first to generate feedback")
 
@@ -217,7 +223,24 @@ with tab1:
 # Tab 2: Test Results
 with tab2:
     st.header("Latest Test Results")
-    
+
+    # Show any feedback batches still queued on the Batch API
+    if st.session_state.pending_batches:
+        st.info(f"⏳ {len(st.session_state.pending_batches)} feedback batch(es) queued on the Batch API")
+        if st.button("Check batch status"):
+            still_pending = []
+            for batch_id in st.session_state.pending_batches:
+                batch_result = performance_evaluator.retrieve_batch_feedback(batch_id)
+                if batch_result is None:
+                    still_pending.append(batch_id)
+                else:
+                    # Merge batch results into the latest feedback
+                    if st.session_state.latest_feedback is None:
+                        st.session_state.latest_feedback = {}
+                    st.session_state.latest_feedback.update(batch_result)
+                    st.toast(f"Batch feedback ready ({batch_id})")
+            st.session_state.pending_batches = still_pending
+
     if st.session_state.latest_metrics:
         # Display metrics
         col1, col2 = st.columns(2)
@@ -232,78 +255,25 @@ with tab2:
             # Convert Value column to numeric to avoid string comparison issues
             metrics_df["Value"] = pd.to_numeric(metrics_df["Value"], errors="coerce")
             
-            # Create a styled dataframe with different styling for repetition_rate
-            styled_df = metrics_df.style
-            
-            # For repetition_rate, highlight low values as good (green) and high values as bad (red)
-            repetition_rate_idx = metrics_df[metrics_df["Metric"] == "repetition_rate"].index
-            if len(repetition_rate_idx) > 0:
-                idx = repetition_rate_idx[0]
-                styled_df = styled_df.highlight_between(
-                    subset=pd.IndexSlice[idx:idx, ["Value"]], 
-                    left=0.0, 
-                    right=repetition_threshold, 
-                    props="background-color:#aaffaa;color:#000000"
-                ).highlight_between(
-                    subset=pd.IndexSlice[idx:idx, ["Value"]], 
-                    left=repetition_threshold, 
-                    right=1.0, 
-                    props="background-color:#ffaaaa;color:#000000"
-                )
-            
-            # For all other metrics, highlight high values as good (green) and low values as bad (red)
-            other_metrics_idx = metrics_df[metrics_df["Metric"] != "repetition_rate"].index
-            if len(other_metrics_idx) > 0:
-                styled_df = styled_df.highlight_between(
-                    subset=pd.IndexSlice[other_metrics_idx, ["Value"]], 
-                    left=negotiation_threshold, 
-                    right=1.0, 
-                    props="background-color:#aaffaa;color:#000000"
-                ).highlight_between(
-                    subset=pd.IndexSlice[other_metrics_idx, ["Value"]], 
-                    left=0.0, 
-                    right=negotiation_threshold, 
-                    props="background-color:#ffaaaa;color:#000000"
-                )
-            
-            st.dataframe(styled_df)
-            
-            # Create a simple bar chart
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            # Color bars based on whether higher or lower values are better for each metric
-            bar_colors = []
-            for metric in metrics_df["Metric"]:
-                if metric == "repetition_rate":
-                    # For repetition rate, lower is better
-                    value = metrics_df.loc[metrics_df["Metric"] == metric, "Value"].values[0]
-                    bar_colors.append('green' if value <= repetition_threshold else 'red')
+            # Style in one pass: green when the metric is on the good side of
+            # its threshold (low for repetition_rate, high for the rest)
+            def _color(row):
+                if row["Metric"] == "repetition_rate":
+                    good = row["Value"] <= repetition_threshold
                 else:
-                    # For other metrics, higher is better
-                    value = metrics_df.loc[metrics_df["Metric"] == metric, "Value"].values[0]
-                    bar_colors.append('green' if value >= negotiation_threshold else 'red')
-            
-            bars = ax.bar(metrics_df["Metric"], metrics_df["Value"], color=bar_colors)
-            
-            # Add threshold lines where applicable
-            ax.axhline(y=repetition_threshold, color='red', linestyle='--', alpha=0.7, label=f'Repetition Threshold ({repetition_threshold})')
-            ax.axhline(y=negotiation_threshold, color='green', linestyle='--', alpha=0.7, label=f'Performance Threshold ({negotiation_threshold})')
-            
-            ax.set_ylim(0, 1)
-            ax.set_ylabel('Score')
-            ax.set_title('Performance Metrics')
-            ax.legend()
-            
-            # Add values on top of bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.annotate(f'{height:.2f}',
-                            xy=(bar.get_x() + bar.get_width() / 2, height),
-                            xytext=(0, 3),
-                            textcoords="offset points",
-                            ha='center', va='bottom')
-            
-            st.pyplot(fig)
+                    good = row["Value"] >= negotiation_threshold
+                color = "#aaffaa" if good else "#ffaaaa"
+                return ["", f"background-color:{color};color:#000000"]
+
+            st.dataframe(metrics_df.style.apply(_color, axis=1))
+            
+            # Native Vega-Lite chart: the data ships to the browser once and
+            # re-renders client-side instead of rasterizing a PNG per rerun
+            st.bar_chart(metrics_df.set_index("Metric"))
+            st.caption(
+                f"Repetition threshold: {repetition_threshold} (lower is better) · "
+                f"Performance threshold: {negotiation_threshold} (higher is better)"
+            )
         
         with col2:
             st.subheader("Improvement Feedback")
@@ -343,63 +313,34 @@ with tab3:
         if len(history_df) > 1:
             st.subheader("Metrics Over Time")
             
-            # Extract metrics from history
-            metric_history = []
-            for entry in st.session_state.iteration_history:
-                metrics = entry["metrics"]
-                metrics["version"] = entry["script_version"]
-                metrics["timestamp"] = entry["timestamp"]
-                metric_history.append(metrics)
-            
-            metric_df = pd.DataFrame(metric_history)
-            
+            # Extract metrics from history without mutating the stored entries
+            metric_df = pd.json_normalize([e["metrics"] for e in st.session_state.iteration_history])
+            metric_df["version"] = [e["script_version"] for e in st.session_state.iteration_history]
+            metric_df["timestamp"] = [e["timestamp"] for e in st.session_state.iteration_history]
+
             # Convert metric columns to numeric to avoid string comparison issues
-            for metric in ["repetition_rate", "negotiation_effectiveness", "resolution_rate", "compliance_score"]:
-                if metric in metric_df.columns:
-                    metric_df[metric] = pd.to_numeric(metric_df[metric], errors="coerce")
-            
-            # Plot
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            # Plot each metric
-            for metric in ["repetition_rate", "negotiation_effectiveness", "resolution_rate", "compliance_score"]:
-                if metric in metric_df.columns:
-                    ax.plot(metric_df["version"], metric_df[metric], marker='o', label=metric)
+            numeric_cols = [m for m in ["repetition_rate", "negotiation_effectiveness", "resolution_rate", "compliance_score"]
+                            if m in metric_df.columns]
+            metric_df[numeric_cols] = metric_df[numeric_cols].apply(pd.to_numeric, errors="coerce")
             
-            ax.set_xlabel('Script Version')
-            ax.set_ylabel('Score')
-            ax.set_title('Metrics Improvement Over Time')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            
-            st.pyplot(fig)
+            # Native Vega-Lite line chart, re-rendered client-side
+            st.line_chart(metric_df.set_index("version")[numeric_cols])
     else:
         st.info("No improvement history yet")
 
 # Tab 4: Conversations
 with tab4:
     st.header("Test Conversations")
-    
-    # If we're showing real-time conversations during simulation
-    if st.session_state.realtime_conv_container is not None:
-        st.subheader("🔄 Test in Progress - Watching Conversations in Real-time")
-        # Real-time conversations will show up here via the container in st.session_state.realtime_conv_container
-    # If there's no active real-time conversation display and we have test conversations
-    elif st.session_state.test_conversations:
+
+    if st.session_state.test_conversations:
         st.subheader("📚 Previous Test Results")
         for i, conversation in enumerate(st.session_state.test_conversations):
             with st.expander(f"Conversation with {conversation.customer_persona.name} (Willingness to pay: {conversation.customer_persona.willingness_to_pay:.2f})"):
                 st.subheader("Customer Persona")
-                st.json({
-                    "name": conversation.customer_persona.name,
-                    "age": conversation.customer_persona.age,
-                    "occupation": conversation.customer_persona.occupation,
-                    "debt_amount": conversation.customer_persona.debt_amount,
-                    "months_behind": conversation.customer_persona.months_behind,
-                    "reasons_for_default": conversation.customer_persona.reasons_for_default,
-                    "communication_style": conversation.customer_persona.communication_style,
-                    "willingness_to_pay": conversation.customer_persona.willingness_to_pay
-                })
+                st.json(conversation.customer_persona.model_dump(
+                    include={"name", "age", "occupation", "debt_amount", "months_behind",
+                             "reasons_for_default", "communication_style", "willingness_to_pay"}
+                ))
                 
                 st.subheader("Conversation")
                 for msg in conversation.messages:
@@ -422,12 +363,17 @@ with tab5:
     if "live_persona" not in st.session_state:
         st.session_state.live_persona = None
     
-    # Display chat messages
-    chat_container = st.container()
-    with chat_container:
+    # Display chat messages. Rendering runs as a fragment so chat updates
+    # re-execute only this block instead of the whole script.
+    @st.fragment
+    def chat_view():
         for message in st.session_state.chat_history:
             with st.chat_message(message["role"]):
                 st.write(message["content"])
+
+    chat_container = st.container()
+    with chat_container:
+        chat_view()
     
     # Sidebar for this tab
     col1, col2 = st.columns([2, 1])
@@ -466,50 +412,71 @@ with tab5:
                         st.write(prompt)
                 
                 try:
-                    # Get AI response
-                    # Prepare the context for the model
-                    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                    
-                    # Prepare conversation history for the model
-                    messages = [
-                        {"role": "system", "content": "You are simulating a debt collection agent following a script. The user is roleplaying as a customer with debt."},
-                        {"role": "system", "content": f"Agent script: {st.session_state.current_script.to_prompt()}"},
-                        {"role": "system", "content": f"Customer persona (only you can see this, never reveal these details directly): {st.session_state.live_persona.to_prompt()}"}
-                    ]
-                    
-                    # Add conversation history
-                    for msg in st.session_state.chat_history:
-                        role = "assistant" if msg["role"] == "assistant" else "user"
-                        messages.append({"role": role, "content": msg["content"]})
+                    # Get AI response using the shared pooled client
+                    client = get_openai_client(hashlib.sha256(api_key.encode()).hexdigest()[:8])
                     
-                    # Create a placeholder for the agent's response
-                    with chat_container:
-                        agent_message_placeholder = st.chat_message("assistant").empty()
-                        agent_message_placeholder.markdown("🤔 Thinking...")
-                    
-                    # Generate response
-                    response = client.chat.completions.create(
+                    # The instructions, script and persona are concatenated
+                    # into a single stable system prefix so OpenAI's automatic
+                    # prompt caching can reuse it across turns; never mutate
+                    # this prefix mid-conversation.
+                    system_prefix = (
+                        "You are simulating a debt collection agent following a script. "
+                        "The user is roleplaying as a customer with debt.\n\n"
+                        f"Agent script: {st.session_state.current_script.to_prompt()}\n\n"
+                        "Customer persona (only you can see this, never reveal these "
+                        f"details directly): {st.session_state.live_persona.to_prompt()}"
+                    )
+
+                    # Chain turns with the Responses API: after the first turn
+                    # the server retains the conversation state, so only the
+                    # new user message is sent. chat_history is kept for
+                    # rendering only - it is no longer the model's input.
+                    if st.session_state.get("last_response_id"):
+                        input_items = [{"role": "user", "content": prompt}]
+                        previous_response_id = st.session_state.last_response_id
+                    else:
+                        # First turn: send the stable prefix and any prior history
+                        input_items = [{"role": "system", "content": system_prefix}]
+                        for msg in st.session_state.chat_history:
+                            role = "assistant" if msg["role"] == "assistant" else "user"
+                            input_items.append({"role": role, "content": msg["content"]})
+                        previous_response_id = None
+
+                    # Generate response, streaming tokens as they arrive so
+                    # the user sees the reply build up
+                    stream = client.responses.create(
                         model="gpt-4o",
-                        messages=messages,
-                        temperature=0.7
+                        input=input_items,
+                        previous_response_id=previous_response_id,
+                        temperature=0.7,
+                        store=True,
+                        stream=True
                     )
-                    
-                    agent_response = response.choices[0].message.content
-                    
+
+                    def stream_tokens():
+                        for event in stream:
+                            if event.type == "response.output_text.delta":
+                                yield event.delta
+                            elif event.type == "response.completed":
+                                st.session_state.last_response_id = event.response.id
+
+                    with chat_container:
+                        with st.chat_message("assistant"):
+                            agent_response = st.write_stream(stream_tokens())
+
                     # Add AI response to chat history
                     st.session_state.chat_history.append({"role": "assistant", "content": agent_response})
                     
-                    # Update the placeholder with the actual response
-                    agent_message_placeholder.markdown(agent_response)
-                    
                 except Exception as e:
+                    logger.exception("Error generating response")
                     st.error(f"Error generating response: {str(e)}")
-                    import traceback
-                    st.exception(f"Detailed error: {traceback.format_exc()}")
+                    if st.session_state.get("debug"):
+                        st.exception(f"Detailed error: {traceback.format_exc()}")
             
             if st.button("Reset Conversation"):
                 st.session_state.chat_history = []
                 st.session_state.live_persona = None
+                st.session_state.last_response_id = None
                 st.rerun()
                 
             if st.button("Save Conversation") and st.session_state.live_persona and len(st.session_state.chat_history) > 1:
@@ -539,37 +506,28 @@ with tab5:
                     
                     st.success(f"Conversation saved! You can view it in the 'Conversations' tab.")
                 except Exception as e:
+                    logger.exception("Error saving conversation")
                     st.error(f"Error saving conversation: {str(e)}")
-                    import traceback
-                    st.exception(f"Detailed error: {traceback.format_exc()}")
+                    if st.session_state.get("debug"):
+                        st.exception(f"Detailed error: {traceback.format_exc()}")
     
     with col2:
         if st.session_state.live_persona:
+            # Build the persona dict once and render both views from it
+            persona_dict = st.session_state.live_persona.model_dump(exclude={"id"})
+
             st.subheader("Customer Persona")
-            st.info(f"""
-            **Name:** {st.session_state.live_persona.name}  
-            **Age:** {st.session_state.live_persona.age}  
-            **Occupation:** {st.session_state.live_persona.occupation}  
-            **Debt Amount:** ${st.session_state.live_persona.debt_amount:.2f}  
-            **Months Behind:** {st.session_state.live_persona.months_behind}  
-            **Willingness to Pay:** {int(st.session_state.live_persona.willingness_to_pay * 100)}%
-            """)
-            
+            st.info(
+                "**Name:** {name}  \n"
+                "**Age:** {age}  \n"
+                "**Occupation:** {occupation}  \n"
+                "**Debt Amount:** ${debt_amount:.2f}  \n"
+                "**Months Behind:** {months_behind}  \n"
+                "**Willingness to Pay:** {willingness_to_pay:.0%}".format(**persona_dict)
+            )
+
             with st.expander("View Full Persona Details"):
-                st.json({
-                    "name": st.session_state.live_persona.name,
-                    "age": st.session_state.live_persona.age,
-                    "occupation": st.session_state.live_persona.occupation,
-                    "income": st.session_state.live_persona.income,
-                    "debt_amount": st.session_state.live_persona.debt_amount,
-                    "months_behind": st.session_state.live_persona.months_behind,
-                    "reasons_for_default": st.session_state.live_persona.reasons_for_default,
-                    "communication_style": st.session_state.live_persona.communication_style,
-                    "negotiation_style": st.session_state.live_persona.negotiation_style,
-                    "objections": st.session_state.live_persona.objections,
-                    "financial_situation": st.session_state.live_persona.financial_situation,
-                    "willingness_to_pay": st.session_state.live_persona.willingness_to_pay
-                })
+                st.json(persona_dict)
 
 # Footer
 st.markdown("---")
@@ -1,11 +1,42 @@
 import os
-import json
+import sys
 import logging
+import textwrap
 from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
+
+import orjson
+from pydantic import BaseModel, PrivateAttr, field_validator, model_validator
 
 logger = logging.getLogger(__name__)
 
+# Static prompt templates, dedented once at import so the rendered prompt
+# doesn't carry source-indentation whitespace into every billed token
+_PROMPT_HEADER = textwrap.dedent("""\
+    You are a debt collection agent working to collect a past-due loan.
+    Your job is to negotiate with the borrower to establish a repayment plan.
+
+    SCRIPT GUIDELINES:
+    {description}
+
+    SCRIPT SECTIONS:
+    """)
+
+_PROMPT_SECTION = "\n--- {name} ---\n{content}\n"
+
+_PROMPT_FOOTER = textwrap.dedent("""
+    IMPORTANT RULES:
+    - Be respectful and professional at all times
+    - Do not make threats or use aggressive language
+    - Listen to the borrower's concerns
+    - Try to find a mutually acceptable payment plan
+    - Document any agreements made during the call
+    - Follow legal compliance guidelines for debt collection
+    """)
+
+# These stay pydantic models: the interning validators below and the
+# model_construct fast path in load_base_script depend on pydantic's
+# hooks, and loads happen once per run, so a faster struct library
+# would not pay for the extra dependency here
 class ScriptSection(BaseModel):
     """A section of the debt collection script."""
     section_id: str
@@ -14,49 +45,52 @@ class ScriptSection(BaseModel):
     content: str
     next_sections: List[str]
 
+    @field_validator("section_id", mode="after")
+    @classmethod
+    def _intern_section_id(cls, v: str) -> str:
+        # Interned ids let the many lookups/comparisons keyed on section_id
+        # hit CPython's pointer-comparison fast path
+        return sys.intern(v)
+
 class DebtCollectionScript(BaseModel):
     """The full debt collection script, organized in sections."""
     script_id: str
     version: str
     description: str
+    # Insertion-ordered, so this one mapping serves both ordered traversal
+    # (to_prompt, serialization) and O(1) lookup by section_id
     sections: Dict[str, ScriptSection]
-    
+
+    # Memoized to_prompt output; mutators must reset this to None
+    _prompt_cache: Optional[str] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _intern_section_keys(self) -> "DebtCollectionScript":
+        # Keep the mapping keys interned as well (see ScriptSection)
+        self.sections = {sys.intern(key): section for key, section in self.sections.items()}
+        return self
+
+
     def get_starting_section(self) -> Optional[ScriptSection]:
         """Get the introduction section of the script."""
-        for section in self.sections.values():
-            if section.section_id == "introduction":
-                return section
-        return next(iter(self.sections.values())) if self.sections else None
+        # sections is keyed by section_id, so this is a single hash lookup;
+        # fall back to the first section for scripts without an introduction
+        return self.sections.get("introduction") or (
+            next(iter(self.sections.values())) if self.sections else None
+        )
     
     def to_prompt(self) -> str:
         """Convert the script to a prompt for the agent to follow."""
-        script_prompt = f"""
-        You are a debt collection agent working to collect a past-due loan.
-        Your job is to negotiate with the borrower to establish a repayment plan.
-        
-        SCRIPT GUIDELINES:
-        {self.description}
-        
-        SCRIPT SECTIONS:
-        """
-        
-        for section in self.sections.values():
-            script_prompt += f"""
-            --- {section.name} ---
-            {section.content}
-            """
-        
-        script_prompt += """
-        IMPORTANT RULES:
-        - Be respectful and professional at all times
-        - Do not make threats or use aggressive language
-        - Listen to the borrower's concerns
-        - Try to find a mutually acceptable payment plan
-        - Document any agreements made during the call
-        - Follow legal compliance guidelines for debt collection
-        """
-        
-        return script_prompt
+        if self._prompt_cache is not None:
+            return self._prompt_cache
+
+        self._prompt_cache = "".join([
+            _PROMPT_HEADER.format(description=self.description),
+            *(_PROMPT_SECTION.format(name=section.name, content=section.content)
+              for section in self.sections.values()),
+            _PROMPT_FOOTER,
+        ])
+        return self._prompt_cache
 
 def load_base_script() -> DebtCollectionScript:
     """
@@ -66,9 +100,22 @@ def load_base_script() -> DebtCollectionScript:
     script_path = os.path.join("config", "base_script.json")
     if os.path.exists(script_path):
         try:
-            with open(script_path, "r") as file:
-                script_data = json.load(file)
-            return DebtCollectionScript(**script_data)
+            with open(script_path, "rb") as file:
+                script_data = orjson.loads(file.read())
+            try:
+                # The file is our own save_script output, so skip pydantic
+                # validation on this trusted path via model_construct.
+                # model_construct also bypasses the interning validator,
+                # so intern the id field here as well to keep this path
+                # consistent with validated construction
+                sections = {}
+                for section_id, section in script_data["sections"].items():
+                    section["section_id"] = sys.intern(section["section_id"])
+                    sections[sys.intern(section_id)] = ScriptSection.model_construct(**section)
+                return DebtCollectionScript.model_construct(**{**script_data, "sections": sections})
+            except Exception:
+                # Fall back to fully validated construction if the fast path trips
+                return DebtCollectionScript(**script_data)
         except Exception as e:
             logger.error(f"Error loading script from {script_path}: {e}")
     
@@ -91,15 +138,14 @@ def save_script(script: DebtCollectionScript, filename: str) -> bool:
         os.makedirs("config", exist_ok=True)
         file_path = os.path.join("config", filename)
         
-        # Convert the script to a dictionary and then to JSON
-        script_dict = script.dict()
-        
-        # Handle nested ScriptSection objects
-        script_json = json.dumps(script_dict, indent=2)
-        
-        # Write to file with explicit encoding
-        with open(file_path, "w", encoding='utf-8') as file:
-            file.write(script_json)
+        # Serialize straight through pydantic-core in one pass, without
+        # building an intermediate dict tree first
+        script_json = script.model_dump_json(indent=2)
+
+        # The whole payload goes out in one write(), so skip the buffered
+        # layer (and its extra copy) entirely
+        with open(file_path, "wb", buffering=0) as file:
+            file.write(script_json.encode("utf-8"))
         
         # Verify the file was created
         if os.path.exists(file_path):
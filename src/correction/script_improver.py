@@ -1,16 +1,39 @@
 import os
-import json
+import re
 import logging
-import copy
 from typing import Dict, Any, List, Optional
 
-import openai
-from openai import OpenAI
+import orjson
 
 from src.agent.debt_collection_agent import DebtCollectionScript, ScriptSection, save_script
 
 logger = logging.getLogger(__name__)
 
+# Cached OpenAI client; constructing one sets up an httpx pool, so reuse it
+# across improvement iterations. The key is re-checked because the Streamlit
+# app sets OPENAI_API_KEY at runtime, after this module is imported.
+_client = None
+_client_api_key: Optional[str] = None
+
+# Single-pass slug builder for section ids derived from section names
+_SLUG_TRANS = str.maketrans({" ": "_", "-": "_"})
+
+def _slugify(name: str) -> str:
+    """Turn a section name into a section_id slug."""
+    return name.lower().translate(_SLUG_TRANS)
+
+def _get_client():
+    """Return a cached OpenAI client, rebuilding it only if the key changed."""
+    global _client, _client_api_key
+    # Imported here so rule-based runs never pay the openai SDK import cost
+    from openai import OpenAI
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if _client is None or _client_api_key != api_key:
+        _client = OpenAI(api_key=api_key)
+        _client_api_key = api_key
+    return _client
+
 def improve_script(
     current_script: DebtCollectionScript,
     feedback: Dict[str, Any]
@@ -25,13 +48,25 @@ def improve_script(
     Returns:
         An improved version of the script
     """
-    # Create a deep copy of the current script to modify
-    improved_script = copy.deepcopy(current_script)
-    
+    # Nothing actionable in the feedback: return the script untouched rather
+    # than paying for the copy, version bump, and file write
+    has_changes = (
+        bool(feedback.get("section_improvements"))
+        or bool(feedback.get("additional_sections_needed"))
+        or (bool(os.getenv("OPENAI_API_KEY")) and bool(feedback.get("general_feedback")))
+    )
+    if not has_changes:
+        logger.info(f"No actionable feedback; keeping script v{current_script.version} unchanged")
+        return current_script
+
+    # Shallow-copy the script and its sections mapping; individual sections
+    # are cloned on write, so unmodified sections are shared with the original
+    improved_script = current_script.model_copy(update={"sections": dict(current_script.sections)})
+
     # Update version number
     current_version = float(improved_script.version)
     improved_script.version = f"{current_version + 0.1:.1f}"
-    
+
     # Log the improvement process
     logger.info(f"Improving script v{current_script.version} to v{improved_script.version}")
     
@@ -68,8 +103,10 @@ def _apply_section_improvements(
     
     for section_id, improvement_text in section_improvements.items():
         if section_id in script.sections:
-            section = script.sections[section_id]
-            
+            # Clone on write so the original script's section stays untouched
+            section = script.sections[section_id].model_copy()
+            script.sections[section_id] = section
+
             # Log the change
             logger.info(f"Improving section '{section.name}' ({section_id})")
             
@@ -77,22 +114,13 @@ def _apply_section_improvements(
             if isinstance(improvement_text, str):
                 # Add improvement note to description
                 section.description = f"{section.description}\nImproved: {improvement_text}"
-                
+
                 # Apply specific improvement types based on section and feedback metrics
                 metrics = feedback.get("metrics", {})
-                
-                if section_id == "payment_discussion" and metrics.get("repetition_rate", 0) > 0.3:
-                    section.content = _reduce_repetition(section.content)
-                    
-                elif section_id == "payment_plan" and metrics.get("negotiation_effectiveness", 1) < 0.6:
-                    section.content = _enhance_negotiation(section.content)
-                    
-                elif section_id == "confirmation" and metrics.get("resolution_rate", 1) < 0.5:
-                    section.content = _strengthen_closing(section.content)
-                    
-                elif section_id == "introduction" and metrics.get("compliance_score", 1) < 0.8:
-                    section.content = _improve_compliance(section.content)
-                    
+
+                rule = _RULES_BY_SECTION.get(section_id)
+                if rule is not None and _rule_triggered(rule, metrics):
+                    section.content = rule[4](section.content)
                 else:
                     # Generic improvement - add a note at the end of the section
                     section.content = f"{section.content}\n\n[Note: {improvement_text}]"
@@ -103,21 +131,31 @@ def _apply_section_improvements(
                 if "description" in improvement_text:
                     section.description = improvement_text["description"]
 
+    if section_improvements:
+        # Section content changed, so the memoized prompt is stale
+        script._prompt_cache = None
+
 def _add_new_sections(
     script: DebtCollectionScript,
     feedback: Dict[str, Any]
 ) -> None:
     """Add new recommended sections to the script."""
     additional_sections = feedback.get("additional_sections_needed", [])
-    
+
+    # Collision counter per base slug; the old len(script.sections) suffix
+    # could itself collide when several same-named sections were added
+    slug_counts: Dict[str, int] = {}
+
     for new_section in additional_sections:
         if isinstance(new_section, dict) and "name" in new_section and "content" in new_section:
-            # Create section ID from name
-            section_id = new_section["name"].lower().replace(" ", "_")
-            
-            # Avoid duplicate IDs
-            if section_id in script.sections:
-                section_id = f"{section_id}_{len(script.sections)}"
+            # Create a unique section ID from the name
+            base = _slugify(new_section["name"])
+            count = slug_counts.get(base, 0)
+            section_id = base if count == 0 else f"{base}_{count}"
+            while section_id in script.sections:
+                count += 1
+                section_id = f"{base}_{count}"
+            slug_counts[base] = count + 1
             
             # Create the new section
             section = ScriptSection(
@@ -141,6 +179,10 @@ def _add_new_sections(
             
             logger.info(f"Added new section: '{section.name}' ({section_id})")
 
+    if additional_sections:
+        # New sections changed the script body, so the memoized prompt is stale
+        script._prompt_cache = None
+
 def _update_section_flow(
     script: DebtCollectionScript,
     source_section_id: str,
@@ -150,7 +192,10 @@ def _update_section_flow(
     if source_section_id in script.sections and target_section_id in script.sections:
         source_section = script.sections[source_section_id]
         if target_section_id not in source_section.next_sections:
-            source_section.next_sections.append(target_section_id)
+            # Clone on write, including the next_sections list being extended
+            script.sections[source_section_id] = source_section.model_copy(
+                update={"next_sections": source_section.next_sections + [target_section_id]}
+            )
             logger.info(f"Updated flow: {source_section_id} -> {target_section_id}")
 
 def _improve_script_with_api(
@@ -158,45 +203,45 @@ def _improve_script_with_api(
     feedback: Dict[str, Any]
 ) -> DebtCollectionScript:
     """Use OpenAI API to generate more sophisticated script improvements."""
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    # Create a deep copy of the current script to modify
-    improved_script = copy.deepcopy(current_script)
-    
+    client = _get_client()
+
+    # Shallow-copy the script and its sections mapping; sections are cloned
+    # on write below
+    improved_script = current_script.model_copy(update={"sections": dict(current_script.sections)})
+
     # Update version number
     current_version = float(improved_script.version)
     improved_script.version = f"{current_version + 0.1:.1f}"
     
-    # Prepare the context for the API
-    script_sections_json = {}
-    for section_id, section in current_script.sections.items():
-        script_sections_json[section_id] = {
-            "name": section.name,
-            "description": section.description,
-            "content": section.content,
-            "next_sections": section.next_sections
-        }
-    
+    # Prepare the context for the API: project just the prompt-relevant
+    # section fields straight through pydantic-core's serializer instead of
+    # hand-building an intermediate dict per section
+    script_sections_json = current_script.model_dump_json(
+        include={"sections": {"__all__": {"name", "description", "content", "next_sections"}}},
+        indent=2
+    )
+
+    # One serializer pass over a single context dict instead of a separate
+    # orjson.dumps call (and prompt header) per feedback field
+    context = {
+        "current_script": orjson.Fragment(script_sections_json),
+        "performance_metrics": feedback.get("metrics", {}),
+        "section_improvements_needed": feedback.get("section_improvements", {}),
+        "additional_sections_recommended": feedback.get("additional_sections_needed", []),
+    }
+    context_json = orjson.dumps(context, option=orjson.OPT_INDENT_2).decode()
+
     prompt = f"""
     You are an expert in optimizing debt collection scripts. Based on the following feedback and metrics,
     improve the debt collection script to address the identified issues.
-    
-    CURRENT SCRIPT:
-    {json.dumps(script_sections_json, indent=2)}
-    
-    PERFORMANCE METRICS:
-    {json.dumps(feedback.get("metrics", {}), indent=2)}
-    
+
+    CONTEXT:
+    {context_json}
+
     GENERAL FEEDBACK:
     {feedback.get("general_feedback", "")}
-    
-    SECTION-SPECIFIC IMPROVEMENTS NEEDED:
-    {json.dumps(feedback.get("section_improvements", {}), indent=2)}
-    
-    ADDITIONAL SECTIONS RECOMMENDED:
-    {json.dumps(feedback.get("additional_sections_needed", []), indent=2)}
-    
-    Please provide an improved version of the script that addresses these issues. For each section,
+
+    Please provide an improved version of the script that addresses the issues in the CONTEXT block. For each section,
     modify the content as needed while maintaining the overall structure and flow.
     
     Return the improved script as a JSON object with the same structure as the original script.
@@ -206,17 +251,26 @@ def _improve_script_with_api(
     """
     
     try:
-        response = client.chat.completions.create(
+        stream = client.chat.completions.create(
             model="gpt-4o",
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": "You are an expert in optimizing debt collection scripts."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
+            temperature=0.3,
+            stream=True
         )
-        
-        improved_sections = json.loads(response.choices[0].message.content)
+
+        # Accumulate deltas as UTF-8 bytes while they arrive and parse the
+        # complete object once with orjson, instead of waiting on one large
+        # message string
+        buffer = bytearray()
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                buffer += chunk.choices[0].delta.content.encode("utf-8")
+
+        improved_sections = orjson.loads(bytes(buffer))
         
         # Update the script with the improved sections
         if "sections" in improved_sections:
@@ -227,8 +281,9 @@ def _improve_script_with_api(
         # Process each section in the response
         for section_id, section_data in improved_data.items():
             if section_id in improved_script.sections:
-                # Update existing section
-                section = improved_script.sections[section_id]
+                # Update existing section, cloning on write
+                section = improved_script.sections[section_id].model_copy()
+                improved_script.sections[section_id] = section
                 if "content" in section_data:
                     section.content = section_data["content"]
                 if "description" in section_data:
@@ -248,7 +303,10 @@ def _improve_script_with_api(
                 )
                 improved_script.sections[section_id] = new_section
                 logger.info(f"Added new section from API: {section_id}")
-        
+
+        # The sections were rewritten, so the memoized prompt is stale
+        improved_script._prompt_cache = None
+
     except Exception as e:
         logger.error(f"Error in API-based script improvement: {e}")
         # Apply simpler improvements as fallback
@@ -265,89 +323,97 @@ def _improve_script_with_api(
     
     return improved_script
 
+# Literal rewrite tables for the _improve helpers. Each helper compiles one
+# alternation over its table keys, so applying the rewrites is a single
+# linear scan instead of one full str.replace pass per literal.
+_REPETITION_TABLE = {
+    "Would you be able to make a payment today?\n\n[If customer can make a payment]\nThat's great. How much would you be able to pay today?":
+        "Would you be able to make a payment today? If so, how much could you manage?"
+}
+_REPETITION_RE = re.compile("|".join(re.escape(key) for key in _REPETITION_TABLE))
+
+_NEGOTIATION_TABLE = {
+    "Option 1: [Payment plan details]\nOption 2: [Alternative payment plan details]":
+        """Option 1: A structured payment plan of smaller monthly amounts over a longer period, which would reduce the immediate financial pressure.
+
+Option 2: A short-term reduced payment plan followed by regular payments, which gives you some breathing room now.
+
+Option 3: A one-time settlement amount if you're able to make a larger payment soon, which would resolve the debt more quickly."""
+}
+_NEGOTIATION_RE = re.compile("|".join(re.escape(key) for key in _NEGOTIATION_TABLE))
+
+_CLOSING_TABLE = {
+    "[Summarize the agreement]":
+        """To confirm, you've agreed to:
+1. Make an initial payment of $[Amount] by [Date]
+2. Follow with [Number] payments of $[Amount] on the [Day] of each month
+3. Complete the final payment by [Date]
+
+Can you confirm that this plan works for you?"""
+}
+_CLOSING_RE = re.compile("|".join(re.escape(key) for key in _CLOSING_TABLE))
+
+_COMPLIANCE_TABLE = {
+    "Hello, my name is [Agent Name] calling from [Company Name].":
+        "Hello, my name is [Agent Name], and I'm calling from [Company Name], a debt collection agency.",
+    "Before we continue, I need to inform you that this call may be recorded for quality assurance purposes.":
+        "Before we continue, I am required to inform you that this call is being recorded for quality assurance and compliance purposes.",
+    "I'm calling regarding your loan account ending in [Last 4 Digits], which is currently past due.":
+        "I'm calling regarding your loan account ending in [Last 4 Digits], which is currently past due. The purpose of this call is to discuss options for bringing your account current."
+}
+_COMPLIANCE_RE = re.compile("|".join(re.escape(key) for key in _COMPLIANCE_TABLE))
+
 def _reduce_repetition(content: str) -> str:
     """Reduce repetition in a script section."""
-    # Example improvement: Consolidate repeated information
-    improved_content = content
-    
-    # Replace specific repetitive patterns
-    if "payment" in content.lower() and "options" in content.lower():
-        improved_content = improved_content.replace(
-            "Would you be able to make a payment today?\n\n[If customer can make a payment]\nThat's great. How much would you be able to pay today?",
-            "Would you be able to make a payment today? If so, how much could you manage?"
-        )
-    
+    # Consolidate repeated information in one pass
+    improved_content = _REPETITION_RE.sub(lambda m: _REPETITION_TABLE[m.group(0)], content)
+
     # Add a more direct approach
     improved_content += "\n\nLet me outline your options clearly so we can find the best solution for your situation."
-    
+
     return improved_content
 
 def _enhance_negotiation(content: str) -> str:
     """Enhance negotiation effectiveness in a script section."""
-    # Add more flexible language and emphasize customer benefits
-    improved_content = content
-    
-    # Replace generic options with more specific ones
-    if "Option 1:" in content and "Option 2:" in content:
-        improved_content = improved_content.replace(
-            "Option 1: [Payment plan details]\nOption 2: [Alternative payment plan details]",
-            """Option 1: A structured payment plan of smaller monthly amounts over a longer period, which would reduce the immediate financial pressure.
-            
-Option 2: A short-term reduced payment plan followed by regular payments, which gives you some breathing room now.
+    # Replace generic options with more specific ones in one pass
+    improved_content = _NEGOTIATION_RE.sub(lambda m: _NEGOTIATION_TABLE[m.group(0)], content)
 
-Option 3: A one-time settlement amount if you're able to make a larger payment soon, which would resolve the debt more quickly."""
-        )
-    
     # Add empathetic language and benefit explanation
     improved_content += "\n\nWhichever option you choose, our goal is to help you successfully resolve this debt in a way that works for your financial situation. Each of these plans would help you avoid additional fees and rebuild your credit over time."
-    
+
     return improved_content
 
 def _strengthen_closing(content: str) -> str:
     """Strengthen the closing and resolution in a script section."""
-    # Add more direct confirmation language
-    improved_content = content
-    
-    # Replace vague confirmation with specific agreement
-    improved_content = improved_content.replace(
-        "[Summarize the agreement]",
-        """To confirm, you've agreed to:
-1. Make an initial payment of $[Amount] by [Date]
-2. Follow with [Number] payments of $[Amount] on the [Day] of each month
-3. Complete the final payment by [Date]
+    # Replace vague confirmation with specific agreement in one pass
+    improved_content = _CLOSING_RE.sub(lambda m: _CLOSING_TABLE[m.group(0)], content)
 
-Can you confirm that this plan works for you?"""
-    )
-    
     # Add a clear next action
     improved_content += "\n\nOnce you confirm, I'll mark this agreement in our system and send your confirmation email right away. Do I have your permission to proceed with this plan?"
-    
+
     return improved_content
 
 def _improve_compliance(content: str) -> str:
     """Improve compliance elements in a script section."""
-    # Ensure all required compliance elements are present
-    improved_content = content
-    
-    # Make sure company and agent identification are clear
-    if "[Agent Name]" in improved_content and "[Company Name]" in improved_content:
-        improved_content = improved_content.replace(
-            "Hello, my name is [Agent Name] calling from [Company Name].",
-            "Hello, my name is [Agent Name], and I'm calling from [Company Name], a debt collection agency."
-        )
-    
-    # Ensure recording disclosure is prominent
-    if "recorded" in improved_content:
-        improved_content = improved_content.replace(
-            "Before we continue, I need to inform you that this call may be recorded for quality assurance purposes.",
-            "Before we continue, I am required to inform you that this call is being recorded for quality assurance and compliance purposes."
-        )
-    
-    # Add purpose statement if missing
-    if "regarding your loan" not in improved_content.lower():
-        improved_content = improved_content.replace(
-            "I'm calling regarding your loan account ending in [Last 4 Digits], which is currently past due.",
-            "I'm calling regarding your loan account ending in [Last 4 Digits], which is currently past due. The purpose of this call is to discuss options for bringing your account current."
-        )
-    
-    return improved_content 
\ No newline at end of file
+    # Apply agent/company identification, recording disclosure and purpose
+    # statement rewrites in a single scan
+    return _COMPLIANCE_RE.sub(lambda m: _COMPLIANCE_TABLE[m.group(0)], content)
+
+# Table-driven improvement rules: (section_id, metric, comparison, threshold,
+# transformer). A rule fires when its metric is on the bad side of the threshold.
+_SECTION_RULES = (
+    ("payment_discussion", "repetition_rate", "gt", 0.3, _reduce_repetition),
+    ("payment_plan", "negotiation_effectiveness", "lt", 0.6, _enhance_negotiation),
+    ("confirmation", "resolution_rate", "lt", 0.5, _strengthen_closing),
+    ("introduction", "compliance_score", "lt", 0.8, _improve_compliance),
+)
+
+# O(1) dispatch by section id
+_RULES_BY_SECTION = {rule[0]: rule for rule in _SECTION_RULES}
+
+def _rule_triggered(rule, metrics: Dict[str, float]) -> bool:
+    """Check whether a section rule's metric threshold is exceeded."""
+    _, metric_name, op, threshold, _ = rule
+    if op == "gt":
+        return metrics.get(metric_name, 0) > threshold
+    return metrics.get(metric_name, 1) < threshold 
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 
 # Configure logging
@@ -39,15 +40,30 @@ def main():
         personas = persona_generator.generate_personas(count=5)
         logger.info(f"Generated {len(personas)} test personas")
         
-        # 2. Run simulated conversations with current script
-        test_results = []
-        for persona in personas:
-            conversation = conversation_simulator.simulate_conversation(
-                agent_script=current_script,
-                customer_persona=persona
-            )
-            test_results.append(conversation)
-            
+        # 2. Run simulated conversations with current script. The calls are
+        # I/O-bound on the OpenAI API, so overlap them across threads; warm
+        # the prompt cache first so the threads share the built string.
+        current_script.to_prompt()
+
+        if os.getenv("SERIAL_SIM"):
+            # Sequential fallback for debugging
+            test_results = [
+                conversation_simulator.simulate_conversation(
+                    agent_script=current_script,
+                    customer_persona=persona
+                )
+                for persona in personas
+            ]
+        else:
+            with ThreadPoolExecutor(max_workers=len(personas)) as executor:
+                test_results = list(executor.map(
+                    lambda persona: conversation_simulator.simulate_conversation(
+                        agent_script=current_script,
+                        customer_persona=persona
+                    ),
+                    personas
+                ))
+
         logger.info(f"Completed {len(test_results)} test conversations")
         
         # 3. Evaluate performance metrics
@@ -4,21 +4,183 @@ import logging
 import json
 from typing import Dict, Any, List, Optional
 from collections import Counter
+from dataclasses import dataclass
 
 import openai
 from openai import OpenAI
 
 from src.testing.conversation_simulator import Conversation
 
+try:
+    import numpy as np
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:  # Fall back to the pure-Python similarity loop
+    _NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+if _NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _repetition_count_kernel(tokens_flat, offsets):
+        """
+        Count phrases whose Jaccard similarity to any earlier phrase exceeds 0.7.
+
+        Phrases are integer-encoded as sorted unique token ids, concatenated in
+        tokens_flat with offsets delimiting each phrase, so the pairwise
+        comparison runs as a merge over int32 arrays instead of Python sets.
+        """
+        n_phrases = offsets.shape[0] - 1
+        count = 0
+        for i in range(n_phrases):
+            a_start, a_end = offsets[i], offsets[i + 1]
+            for j in range(i):
+                b_start, b_end = offsets[j], offsets[j + 1]
+                intersection = 0
+                x, y = a_start, b_start
+                while x < a_end and y < b_end:
+                    if tokens_flat[x] == tokens_flat[y]:
+                        intersection += 1
+                        x += 1
+                        y += 1
+                    elif tokens_flat[x] < tokens_flat[y]:
+                        x += 1
+                    else:
+                        y += 1
+                union = (a_end - a_start) + (b_end - b_start) - intersection
+                if union > 0 and intersection / union > 0.7:
+                    count += 1
+                    break
+        return count
+
+# All evaluator patterns compiled once at import. They are probed for every
+# agent message of every conversation, so per-call re-cache lookups and
+# pattern parsing would dominate the regex work itself. IGNORECASE replaces
+# the per-message .lower() passes.
+#
+# The boolean categories below are fused into one alternation each; the
+# counting lists (resolution and prohibited language) must stay as separate
+# patterns. A fused scan only yields non-overlapping matches, so a greedy
+# pattern like "(will|can) pay (.*) on (.*)" would swallow text containing
+# later indicators and skew the counts.
+def _union_pattern(patterns) -> "re.Pattern":
+    """Merge alternative patterns into one compiled alternation."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+# Each negotiation category only needs one boolean per conversation, so its
+# alternatives are union-merged into a single pattern run once over the
+# joined agent text rather than per pattern per message
+_NEGOTIATION_CATEGORY_PATTERNS = {
+    "offers_options": _union_pattern((
+        r'(option|plan|alternative) [123]',
+        r'(several|multiple|different) options',
+        r'(could|can|might) (offer|provide|suggest)',
+    )),
+    "acknowledges_concerns": _union_pattern((
+        r'(understand|appreciate|recognize) (your|the) (concern|situation|difficulty)',
+        r'(sorry|apologize) to hear',
+        r'(must be|sounds) (difficult|challenging|tough)',
+        r'thank you for (explaining|sharing)',
+    )),
+    "provides_alternatives": _union_pattern((
+        r'(another|different|alternative) (option|approach|plan)',
+        r'(instead|alternatively)',
+        r'(we could|we can|let\'s) (try|consider)',
+    )),
+    "explains_benefits": _union_pattern((
+        r'(benefit|advantage|help) (you|your)',
+        r'(this way|this will|this means)',
+        r'(allow you to|enable you to|help you)',
+    )),
+    "closes_agreement": _union_pattern((
+        r'(do we have|have we reached) (an agreement|a deal)',
+        r'(does that|is this) (work|acceptable|agreeable)',
+        r'(shall we|should we) (proceed|move forward)',
+        r'(confirm|agree to) (the|this) (plan|arrangement|payment)',
+    )),
+}
+
+_RESOLUTION_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(agree|agreed|accept|commitment) (to|on) (payment|plan)',
+    r'(will|can) pay (.*) on (.*)',
+    r'(schedule|set up) (the|a) payment',
+    r'(thank you|appreciate) (for|your) (help|assistance|understanding)',
+    r'(next|follow-up|confirmation) (steps|process|email)',
+))
+
+_NON_RESOLUTION_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(call back|contact you later|think about it)',
+    r'(not|can\'t) (agree|accept|afford)',
+    r'(need more|additional) (time|information)',
+    r'(unhappy|dissatisfied) with',
+    r'(disconnect|hang up)',
+))
+
+_COMPLIANCE_PATTERNS = {
+    "identifies_self": re.compile(r'(my name is|this is) [a-z]+', re.IGNORECASE),
+    "states_company": re.compile(r'(calling from|with) [a-z ]+', re.IGNORECASE),
+    "states_recording": re.compile(r'(call|conversation) (may be|is being) recorded', re.IGNORECASE),
+    "verifies_identity": re.compile(r'(verify|confirm) (your|identity|information)', re.IGNORECASE),
+    "explains_purpose": re.compile(r'(regarding|about|concerning) (your|the) (loan|account|payment)', re.IGNORECASE),
+}
+
+# Maps sentence-ending punctuation to one delimiter so sentence splitting
+# runs as translate + split instead of the regex engine
+_SENTENCE_TRANS = str.maketrans("!?", "..")
+
+# Prohibited-language patterns, flattened across the threatening/harassment/
+# false-statement categories (each match costs the same 0.2 penalty)
+_PROHIBITED_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(legal action|lawsuit|court|police|arrest)',
+    r'(must|have to|required to) pay (immediately|now)',
+    r'(consequences|penalties) (will|shall) (occur|happen|follow)',
+    r'(fail|refuse|neglect) to pay',
+    r'(irresponsible|negligent|delinquent)',
+    r'(repeatedly|continuously|again and again)',
+    r'(only|last|final) (chance|opportunity)',
+    r'(guaranteed|promise) to (remove|clear|fix)',
+    r'(immediately|instantly) (improve|increase|raise)',
+))
+
+@dataclass
+class _PreprocessedConversation:
+    """Per-conversation text artifacts shared by the metric calculators."""
+    agent_messages: List[str]
+    customer_message_count: int
+    all_agent_text: str
+    last_messages_text: str
+    message_count: int
+
+def _preprocess(conversation: Conversation) -> _PreprocessedConversation:
+    """
+    Split and join the conversation text once for all five scorers.
+
+    No lowercased copies are kept: the compiled patterns all carry
+    IGNORECASE, so the joined text is matched as-is.
+    """
+    agent_messages = []
+    customer_message_count = 0
+    for message in conversation.messages:
+        if message.role == "agent":
+            agent_messages.append(message.content)
+        elif message.role == "customer":
+            customer_message_count += 1
+
+    return _PreprocessedConversation(
+        agent_messages=agent_messages,
+        customer_message_count=customer_message_count,
+        all_agent_text=" ".join(agent_messages),
+        last_messages_text=" ".join(m.content for m in conversation.messages[-4:]),
+        message_count=len(conversation.messages),
+    )
+
 def evaluate_conversations(conversations: List[Conversation]) -> Dict[str, float]:
     """
     Evaluate the performance of the agent across multiple test conversations.
-    
+
     Args:
         conversations: List of conversation objects to evaluate
-        
+
     Returns:
         Dictionary of performance metrics
     """
@@ -30,321 +192,262 @@ def evaluate_conversations(conversations: List[Conversation]) -> Dict[str, float
         "resolution_rate": 0.0,
         "compliance_score": 0.0
     }
-    
+
     # Calculate average metrics across all conversations
     if not conversations:
         return metrics
-    
-    # Calculate repetition rate
-    repetition_scores = [_calculate_repetition_rate(c) for c in conversations]
-    metrics["repetition_rate"] = sum(repetition_scores) / len(repetition_scores)
-    
-    # Calculate negotiation effectiveness
-    negotiation_scores = [_calculate_negotiation_effectiveness(c) for c in conversations]
-    metrics["negotiation_effectiveness"] = sum(negotiation_scores) / len(negotiation_scores)
-    
-    # Calculate average turn count
-    turn_counts = [len(c.messages) // 2 for c in conversations]  # Divide by 2 for agent-customer pairs
-    metrics["average_turn_count"] = sum(turn_counts) / len(turn_counts)
-    
-    # Calculate resolution rate
-    resolution_scores = [_calculate_resolution_score(c) for c in conversations]
-    metrics["resolution_rate"] = sum(resolution_scores) / len(resolution_scores)
-    
-    # Calculate compliance score
-    compliance_scores = [_calculate_compliance_score(c) for c in conversations]
-    metrics["compliance_score"] = sum(compliance_scores) / len(compliance_scores)
-    
+
+    # Preprocess each conversation once; the calculators share the result
+    # rather than re-splitting and re-joining the messages per metric,
+    # folding the results into running sums instead of materializing
+    # score lists. Scored serially on purpose: the scorers are GIL-bound
+    # regex work, so a thread pool adds scheduling overhead without
+    # parallelism, and processes would pay to pickle every conversation.
+    count = len(conversations)
+    rep_sum = neg_sum = turn_sum = res_sum = comp_sum = 0.0
+    for prep in map(_preprocess, conversations):
+        rep, neg, turns, res, comp = _score_conversation(prep)
+        rep_sum += rep
+        neg_sum += neg
+        turn_sum += turns
+        res_sum += res
+        comp_sum += comp
+
+    metrics["repetition_rate"] = rep_sum / count
+    metrics["negotiation_effectiveness"] = neg_sum / count
+    metrics["average_turn_count"] = turn_sum / count
+    metrics["resolution_rate"] = res_sum / count
+    metrics["compliance_score"] = comp_sum / count
+
     return metrics
 
+def _score_conversation(prep: _PreprocessedConversation) -> tuple:
+    """Compute all five per-conversation metric values."""
+    return (
+        _calculate_repetition_rate(prep),
+        _calculate_negotiation_effectiveness(prep),
+        prep.message_count // 2,  # Divide by 2 for agent-customer pairs
+        _calculate_resolution_score(prep),
+        _calculate_compliance_score(prep),
+    )
+
 def generate_improvement_feedback(
-    conversations: List[Conversation], 
-    metrics: Dict[str, float]
+    conversations: List[Conversation],
+    metrics: Dict[str, float],
+    batch_mode: bool = False
 ) -> Dict[str, Any]:
     """
     Generate feedback for improving the agent script based on test results.
-    
+
     Args:
         conversations: List of conversations to analyze
         metrics: Dictionary of performance metrics
-        
+        batch_mode: If True, submit the analysis through the OpenAI Batch API
+            (50% cheaper, minutes-to-hours latency). The returned feedback then
+            contains a "batch_id" to poll with retrieve_batch_feedback, with
+            rule-based feedback filled in as a placeholder until results land.
+
     Returns:
         Dictionary containing feedback and suggested improvements
     """
     # Use OpenAI API for advanced analysis if available
     if os.getenv("OPENAI_API_KEY"):
+        if batch_mode:
+            return _submit_improvement_feedback_batch(conversations, metrics)
         return _generate_improvement_feedback_with_api(conversations, metrics)
     else:
         # Fallback to rule-based analysis
         return _generate_improvement_feedback_rule_based(conversations, metrics)
 
-def _calculate_repetition_rate(conversation: Conversation) -> float:
+def _calculate_repetition_rate(prep: _PreprocessedConversation) -> float:
     """
     Calculate how often the agent repeats itself unnecessarily.
     Lower is better (less repetition).
-    
+
     Returns a value between 0.0 (no repetition) and 1.0 (high repetition).
     """
-    agent_messages = [m.content for m in conversation.messages if m.role == "agent"]
-    if len(agent_messages) <= 1:
+    if len(prep.agent_messages) <= 1:
         return 0.0
-    
+
     # Simplified approach: Check for repeated phrases
-    repetition_count = 0
     significant_phrases = []
-    
-    for message in agent_messages:
-        # Extract significant phrases (length > 5 words)
-        phrases = [p.strip() for p in re.findall(r'[^.!?]+[.!?]', message)]
-        phrases = [p for p in phrases if len(p.split()) > 5]
-        
-        for phrase in phrases:
-            # Check if this is a repetition of an earlier phrase
-            for existing_phrase in significant_phrases:
-                if _phrase_similarity(phrase, existing_phrase) > 0.7:
-                    repetition_count += 1
-                    break
-            significant_phrases.append(phrase)
-    
-    # Calculate the rate
+
+    for message in prep.agent_messages:
+        # Extract significant phrases (length > 5 words); translate + split
+        # is a pure C-level scan, cheaper than the regex engine for the
+        # short messages this runs on
+        for phrase in message.translate(_SENTENCE_TRANS).split("."):
+            phrase = phrase.strip()
+            if len(phrase.split()) > 5:
+                significant_phrases.append(phrase)
+
     if not significant_phrases:
         return 0.0
-    
+
+    # Identical canned phrases are exact repetitions (similarity 1.0), so
+    # count those through a Counter up front and run the fuzzy similarity
+    # pass only over the much smaller unique set
+    phrase_counts = Counter(significant_phrases)
+    repetition_count = sum(n - 1 for n in phrase_counts.values() if n > 1)
+    unique_phrases = list(phrase_counts)
+
+    if _NUMBA_AVAILABLE:
+        # Integer-encode each phrase's word set and run the jitted kernel
+        vocab = {}
+        encoded_phrases = []
+        for phrase in unique_phrases:
+            token_ids = {vocab.setdefault(word, len(vocab)) for word in phrase.lower().split()}
+            encoded_phrases.append(sorted(token_ids))
+
+        tokens_flat = np.array(
+            [token for tokens in encoded_phrases for token in tokens], dtype=np.int32
+        )
+        offsets = np.zeros(len(encoded_phrases) + 1, dtype=np.int64)
+        np.cumsum([len(tokens) for tokens in encoded_phrases], out=offsets[1:])
+        repetition_count += _repetition_count_kernel(tokens_flat, offsets)
+    else:
+        # Inverted word -> phrase-id index: a Jaccard similarity above 0.7
+        # requires shared words, so each phrase is compared only against the
+        # earlier phrases it shares at least one word with. Word sets are
+        # encoded as int bitmasks (bit per distinct token), turning each
+        # Jaccard check into two popcounts instead of set operations.
+        token_bits: Dict[str, int] = {}
+        word_index: Dict[str, List[int]] = {}
+        phrase_masks: List[int] = []
+        for i, phrase in enumerate(unique_phrases):
+            words = set(phrase.lower().split())
+            mask = 0
+            for word in words:
+                mask |= 1 << token_bits.setdefault(word, len(token_bits))
+            candidates = set()
+            for word in words:
+                candidates.update(word_index.get(word, ()))
+            for j in candidates:
+                earlier_mask = phrase_masks[j]
+                union = (mask | earlier_mask).bit_count()
+                if union > 0 and (mask & earlier_mask).bit_count() / union > 0.7:
+                    repetition_count += 1
+                    break
+            phrase_masks.append(mask)
+            for word in words:
+                word_index.setdefault(word, []).append(i)
+
     return min(1.0, repetition_count / len(significant_phrases))
 
-def _calculate_negotiation_effectiveness(conversation: Conversation) -> float:
+def _calculate_negotiation_effectiveness(prep: _PreprocessedConversation) -> float:
     """
     Calculate how effectively the agent negotiates.
     Higher is better (more effective negotiation).
-    
+
     Returns a value between 0.0 (poor negotiation) and 1.0 (excellent negotiation).
     """
-    agent_messages = [m.content for m in conversation.messages if m.role == "agent"]
-    customer_messages = [m.content for m in conversation.messages if m.role == "customer"]
-    
-    if len(agent_messages) < 3 or len(customer_messages) < 2:
+    if len(prep.agent_messages) < 3 or prep.customer_message_count < 2:
         return 0.5  # Not enough interaction to judge
-    
-    # Look for negotiation elements in agent messages
-    negotiation_elements = {
-        "offers_options": False,
-        "acknowledges_concerns": False,
-        "provides_alternatives": False,
-        "explains_benefits": False,
-        "closes_agreement": False
-    }
-    
-    # Check for options
-    options_patterns = [
-        r'(option|plan|alternative) [123]',
-        r'(several|multiple|different) options',
-        r'(could|can|might) (offer|provide|suggest)'
-    ]
-    for message in agent_messages:
-        for pattern in options_patterns:
-            if re.search(pattern, message.lower()):
-                negotiation_elements["offers_options"] = True
-                break
-    
-    # Check for acknowledgment of concerns
-    acknowledgment_patterns = [
-        r'(understand|appreciate|recognize) (your|the) (concern|situation|difficulty)',
-        r'(sorry|apologize) to hear',
-        r'(must be|sounds) (difficult|challenging|tough)',
-        r'thank you for (explaining|sharing)'
-    ]
-    for message in agent_messages:
-        for pattern in acknowledgment_patterns:
-            if re.search(pattern, message.lower()):
-                negotiation_elements["acknowledges_concerns"] = True
-                break
-    
-    # Check for alternatives
-    alternative_patterns = [
-        r'(another|different|alternative) (option|approach|plan)',
-        r'(instead|alternatively)',
-        r'(we could|we can|let\'s) (try|consider)'
-    ]
-    for message in agent_messages:
-        for pattern in alternative_patterns:
-            if re.search(pattern, message.lower()):
-                negotiation_elements["provides_alternatives"] = True
-                break
-    
-    # Check for explaining benefits
-    benefit_patterns = [
-        r'(benefit|advantage|help) (you|your)',
-        r'(this way|this will|this means)',
-        r'(allow you to|enable you to|help you)'
-    ]
-    for message in agent_messages:
-        for pattern in benefit_patterns:
-            if re.search(pattern, message.lower()):
-                negotiation_elements["explains_benefits"] = True
-                break
-    
-    # Check for closing agreement
-    closing_patterns = [
-        r'(do we have|have we reached) (an agreement|a deal)',
-        r'(does that|is this) (work|acceptable|agreeable)',
-        r'(shall we|should we) (proceed|move forward)',
-        r'(confirm|agree to) (the|this) (plan|arrangement|payment)'
-    ]
-    for message in agent_messages:
-        for pattern in closing_patterns:
-            if re.search(pattern, message.lower()):
-                negotiation_elements["closes_agreement"] = True
-                break
-    
-    # Calculate effectiveness score
-    elements_present = sum(1 for value in negotiation_elements.values() if value)
-    return elements_present / len(negotiation_elements)
 
-def _calculate_resolution_score(conversation: Conversation) -> float:
+    # Look for negotiation elements anywhere in the agent's side of the
+    # conversation; only the number of matched categories feeds the score,
+    # so count matches directly instead of building a per-category dict
+    elements_present = sum(
+        1 for pattern in _NEGOTIATION_CATEGORY_PATTERNS.values()
+        if pattern.search(prep.all_agent_text)
+    )
+    return elements_present / len(_NEGOTIATION_CATEGORY_PATTERNS)
+
+def _calculate_resolution_score(prep: _PreprocessedConversation) -> float:
     """
     Calculate how often conversations end with a resolution.
     Higher is better (more resolved conversations).
-    
+
     Returns a value between 0.0 (no resolution) and 1.0 (clear resolution).
     """
-    if len(conversation.messages) < 4:
+    if prep.message_count < 4:
         return 0.0  # Too short to have a resolution
-    
-    # Extract the last few messages
-    last_messages = conversation.messages[-4:]
-    last_messages_text = " ".join(m.content.lower() for m in last_messages)
-    
-    # Check for resolution indicators
-    resolution_indicators = [
-        r'(agree|agreed|accept|commitment) (to|on) (payment|plan)',
-        r'(will|can) pay (.*) on (.*)',
-        r'(schedule|set up) (the|a) payment',
-        r'(thank you|appreciate) (for|your) (help|assistance|understanding)',
-        r'(next|follow-up|confirmation) (steps|process|email)'
-    ]
-    
+
+    # Check for resolution indicators in the last few messages
     resolution_points = 0
-    for pattern in resolution_indicators:
-        if re.search(pattern, last_messages_text):
+    for pattern in _RESOLUTION_PATTERNS:
+        if pattern.search(prep.last_messages_text):
             resolution_points += 1
-    
+
     # Check for non-resolution indicators
-    non_resolution_indicators = [
-        r'(call back|contact you later|think about it)',
-        r'(not|can\'t) (agree|accept|afford)',
-        r'(need more|additional) (time|information)',
-        r'(unhappy|dissatisfied) with',
-        r'(disconnect|hang up)'
-    ]
-    
-    for pattern in non_resolution_indicators:
-        if re.search(pattern, last_messages_text):
+    for pattern in _NON_RESOLUTION_PATTERNS:
+        if pattern.search(prep.last_messages_text):
             resolution_points -= 1
     
     # Normalize to 0.0-1.0 range
     normalized_score = (resolution_points + 3) / 6  # Range from -3 to +3 normalized to 0.0-1.0
     return max(0.0, min(1.0, normalized_score))
 
-def _calculate_compliance_score(conversation: Conversation) -> float:
+def _calculate_compliance_score(prep: _PreprocessedConversation) -> float:
     """
     Calculate how well the agent follows compliance guidelines.
     Higher is better (more compliant).
-    
+
     Returns a value between 0.0 (poor compliance) and 1.0 (excellent compliance).
     """
-    agent_messages = [m.content.lower() for m in conversation.messages if m.role == "agent"]
-    if not agent_messages:
+    if not prep.agent_messages:
         return 0.0
-    
-    all_agent_text = " ".join(agent_messages)
-    
-    # Check for required compliance elements
-    compliance_elements = {
-        "identifies_self": False,
-        "states_company": False,
-        "states_recording": False,
-        "verifies_identity": False,
-        "explains_purpose": False
-    }
-    
-    # Check for agent identification
-    if re.search(r'(my name is|this is) [a-z]+', all_agent_text):
-        compliance_elements["identifies_self"] = True
-    
-    # Check for company identification
-    if re.search(r'(calling from|with) [a-z ]+', all_agent_text):
-        compliance_elements["states_company"] = True
-    
-    # Check for recording disclosure
-    if re.search(r'(call|conversation) (may be|is being) recorded', all_agent_text):
-        compliance_elements["states_recording"] = True
-    
-    # Check for identity verification
-    if re.search(r'(verify|confirm) (your|identity|information)', all_agent_text):
-        compliance_elements["verifies_identity"] = True
-    
-    # Check for purpose statement
-    if re.search(r'(regarding|about|concerning) (your|the) (loan|account|payment)', all_agent_text):
-        compliance_elements["explains_purpose"] = True
-    
+
+    # Check for required compliance elements; as with negotiation, only the
+    # match count feeds the score
+    compliance_count = sum(
+        1 for pattern in _COMPLIANCE_PATTERNS.values()
+        if pattern.search(prep.all_agent_text)
+    )
+
     # Check for prohibited language (weighted negatively)
-    prohibited_language = {
-        "threatening": [
-            r'(legal action|lawsuit|court|police|arrest)',
-            r'(must|have to|required to) pay (immediately|now)',
-            r'(consequences|penalties) (will|shall) (occur|happen|follow)'
-        ],
-        "harassment": [
-            r'(fail|refuse|neglect) to pay',
-            r'(irresponsible|negligent|delinquent)',
-            r'(repeatedly|continuously|again and again)'
-        ],
-        "false_statements": [
-            r'(only|last|final) (chance|opportunity)',
-            r'(guaranteed|promise) to (remove|clear|fix)',
-            r'(immediately|instantly) (improve|increase|raise)'
-        ]
-    }
-    
     prohibited_count = 0
-    for category, patterns in prohibited_language.items():
-        for pattern in patterns:
-            if re.search(pattern, all_agent_text):
-                prohibited_count += 1
-    
+    for pattern in _PROHIBITED_PATTERNS:
+        if pattern.search(prep.all_agent_text):
+            prohibited_count += 1
+
     # Calculate the compliance score
-    compliance_count = sum(1 for value in compliance_elements.values() if value)
-    compliance_score = compliance_count / len(compliance_elements)
+    compliance_score = compliance_count / len(_COMPLIANCE_PATTERNS)
     
     # Reduce score for prohibited language
     compliance_score = max(0.0, compliance_score - (prohibited_count * 0.2))
     
     return compliance_score
 
-def _phrase_similarity(phrase1: str, phrase2: str) -> float:
+def _format_sample(conversation: Conversation, max_messages: int = 20, max_chars: int = 4000) -> str:
     """
-    Calculate a simple similarity score between two phrases.
-    
-    Returns a value between 0.0 (no similarity) and 1.0 (identical).
+    Format one conversation for API analysis, eliding the middle of long
+    dialogues. The opening turns carry the compliance elements and the
+    trailing turns carry the resolution, so those are what the analysis
+    needs; the elision keeps prompt tokens bounded per sample.
     """
-    words1 = set(phrase1.lower().split())
-    words2 = set(phrase2.lower().split())
-    
-    if not words1 or not words2:
-        return 0.0
-    
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
-    
-    return len(intersection) / len(union)
+    messages = conversation.messages
+    if len(messages) > max_messages:
+        head = messages[:max_messages // 2]
+        tail = messages[-(max_messages - max_messages // 2):]
+        lines = [f"{m.role.upper()}: {m.content}" for m in head]
+        lines.append(f"... [{len(messages) - len(head) - len(tail)} turns omitted] ...")
+        lines.extend(f"{m.role.upper()}: {m.content}" for m in tail)
+    else:
+        lines = [f"{m.role.upper()}: {m.content}" for m in messages]
+
+    messages_text = "\n".join(lines)
+    if len(messages_text) > max_chars:
+        half = max_chars // 2
+        messages_text = f"{messages_text[:half]}\n... [sample truncated] ...\n{messages_text[-half:]}"
+    return messages_text
+
+def _build_conversation_samples(conversations: List[Conversation]) -> str:
+    """Format a few conversations as text samples for API analysis."""
+    conversation_samples = []
+    for i, conv in enumerate(conversations[:3]):  # Limit to 3 samples for API context
+        messages_text = _format_sample(conv)
+        conversation_samples.append(f"CONVERSATION {i+1} (Persona: {conv.customer_persona.name}):\n{messages_text}")
+
+    return "\n\n".join(conversation_samples)
 
 def _generate_improvement_feedback_with_api(
-    conversations: List[Conversation], 
+    conversations: List[Conversation],
     metrics: Dict[str, float]
 ) -> Dict[str, Any]:
     """Generate improvement feedback using OpenAI API."""
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
+
     feedback = {
         "metrics": metrics,
         "general_feedback": "",
@@ -352,85 +455,51 @@ def _generate_improvement_feedback_with_api(
         "additional_sections_needed": [],
         "section_improvements": {}
     }
-    
+
     # Prepare conversation samples for analysis
-    conversation_samples = []
-    for i, conv in enumerate(conversations[:3]):  # Limit to 3 samples for API context
-        messages_text = "\n".join([f"{m.role.upper()}: {m.content}" for m in conv.messages])
-        conversation_samples.append(f"CONVERSATION {i+1} (Persona: {conv.customer_persona.name}):\n{messages_text}")
-    
-    conversation_text = "\n\n".join(conversation_samples)
-    
+    conversation_text = _build_conversation_samples(conversations)
+
     try:
-        # Get general feedback
-        general_prompt = f"""
-        You are an expert in analyzing debt collection conversations.
-        
+        # One call covers both the general assessment and the script-level
+        # improvements; the conversation samples are large and would
+        # otherwise be sent (and billed) twice, plus a second round trip
+        analysis_prompt = f"""
+        You are an expert in analyzing debt collection conversations and improving debt collection scripts.
+
         METRICS:
         {json.dumps(metrics, indent=2)}
-        
+
         CONVERSATION SAMPLES:
         {conversation_text}
-        
+
         Based on these conversations and metrics, provide:
         1. General feedback on the agent's performance
         2. 3-5 specific areas for improvement
-        
+        3. Which script sections need improvement, with specific text changes
+        4. Any new sections that should be added
+
         Format your response as JSON with these fields:
         - general_feedback: A paragraph of overall assessment
         - improvement_areas: Array of specific improvement suggestions
-        """
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": "You analyze debt collection conversations and provide expert feedback."},
-                {"role": "user", "content": general_prompt}
-            ],
-            temperature=0.4
-        )
-        
-        general_feedback_data = json.loads(response.choices[0].message.content)
-        feedback["general_feedback"] = general_feedback_data.get("general_feedback", "")
-        
-        # Generate script section improvements
-        section_prompt = f"""
-        You are an expert in improving debt collection scripts.
-        
-        METRICS:
-        {json.dumps(metrics, indent=2)}
-        
-        CONVERSATION SAMPLES:
-        {conversation_text}
-        
-        IMPROVEMENT AREAS:
-        {json.dumps(general_feedback_data.get("improvement_areas", []), indent=2)}
-        
-        Based on this analysis, provide specific script improvements:
-        1. Identify which script sections need improvement
-        2. Suggest specific text changes for those sections
-        3. Recommend any new sections that should be added
-        
-        Format your response as JSON with these fields:
         - section_improvements: Object with section_id keys and improvement text values
         - additional_sections_needed: Array of objects with name and content fields
         """
-        
+
         response = client.chat.completions.create(
             model="gpt-4o",
             response_format={"type": "json_object"},
             messages=[
-                {"role": "system", "content": "You improve debt collection scripts based on conversation analysis."},
-                {"role": "user", "content": section_prompt}
+                {"role": "system", "content": "You analyze debt collection conversations and improve the scripts behind them."},
+                {"role": "user", "content": analysis_prompt}
             ],
             temperature=0.4
         )
-        
-        script_improvements = json.loads(response.choices[0].message.content)
-        feedback["section_improvements"] = script_improvements.get("section_improvements", {})
-        feedback["additional_sections_needed"] = script_improvements.get("additional_sections_needed", [])
-        
+
+        analysis_data = json.loads(response.choices[0].message.content)
+        feedback["general_feedback"] = analysis_data.get("general_feedback", "")
+        feedback["section_improvements"] = analysis_data.get("section_improvements", {})
+        feedback["additional_sections_needed"] = analysis_data.get("additional_sections_needed", [])
+
     except Exception as e:
         logger.error(f"Error generating improvement feedback with API: {e}")
         # Fallback to rule-based feedback
@@ -438,8 +507,188 @@ def _generate_improvement_feedback_with_api(
     
     return feedback
 
+def _submit_improvement_feedback_batch(
+    conversations: List[Conversation],
+    metrics: Dict[str, float]
+) -> Dict[str, Any]:
+    """
+    Submit the improvement-feedback analysis through the OpenAI Batch API.
+
+    Batched requests cost 50% less than synchronous ones but complete within a
+    24h window, so this path is for non-interactive runs. Returns rule-based
+    feedback as a placeholder with a "batch_id" key to poll via
+    retrieve_batch_feedback.
+    """
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    conversation_text = _build_conversation_samples(conversations)
+
+    general_prompt = f"""
+    You are an expert in analyzing debt collection conversations.
+
+    METRICS:
+    {json.dumps(metrics, indent=2)}
+
+    CONVERSATION SAMPLES:
+    {conversation_text}
+
+    Based on these conversations and metrics, provide:
+    1. General feedback on the agent's performance
+    2. 3-5 specific areas for improvement
+
+    Format your response as JSON with these fields:
+    - general_feedback: A paragraph of overall assessment
+    - improvement_areas: Array of specific improvement suggestions
+    """
+
+    # In batch mode the two requests run independently, so the section prompt
+    # cannot reference the general response's improvement areas
+    section_prompt = f"""
+    You are an expert in improving debt collection scripts.
+
+    METRICS:
+    {json.dumps(metrics, indent=2)}
+
+    CONVERSATION SAMPLES:
+    {conversation_text}
+
+    Based on this analysis, provide specific script improvements:
+    1. Identify which script sections need improvement
+    2. Suggest specific text changes for those sections
+    3. Recommend any new sections that should be added
+
+    Format your response as JSON with these fields:
+    - section_improvements: Object with section_id keys and improvement text values
+    - additional_sections_needed: Array of objects with name and content fields
+    """
+
+    batch_requests = [
+        {
+            "custom_id": "general_feedback",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": "gpt-4o",
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {"role": "system", "content": "You analyze debt collection conversations and provide expert feedback."},
+                    {"role": "user", "content": general_prompt}
+                ],
+                "temperature": 0.4
+            }
+        },
+        {
+            "custom_id": "section_improvements",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": "gpt-4o",
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {"role": "system", "content": "You improve debt collection scripts based on conversation analysis."},
+                    {"role": "user", "content": section_prompt}
+                ],
+                "temperature": 0.4
+            }
+        }
+    ]
+
+    # Start with rule-based feedback so callers have something usable
+    # while the batch is pending
+    feedback = _generate_improvement_feedback_rule_based(conversations, metrics)
+
+    try:
+        batch_jsonl = "\n".join(json.dumps(request) for request in batch_requests)
+        batch_file = client.files.create(
+            file=("eval_batch.jsonl", batch_jsonl.encode("utf-8")),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        feedback["batch_id"] = batch.id
+        logger.info(f"Submitted improvement feedback batch {batch.id}")
+    except Exception as e:
+        logger.error(f"Error submitting feedback batch: {e}")
+
+    return feedback
+
+def retrieve_batch_feedback(batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Poll a feedback batch submitted via batch_mode.
+
+    Returns None while the batch is still running. Once completed, returns a
+    dictionary with the general_feedback, section_improvements and
+    additional_sections_needed fields parsed from the batch output.
+    """
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    try:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            if batch.status in ("failed", "expired", "cancelled"):
+                logger.error(f"Feedback batch {batch_id} ended with status {batch.status}")
+            return None
+
+        output = client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            content = result["response"]["body"]["choices"][0]["message"]["content"]
+            results[result["custom_id"]] = json.loads(content)
+
+        general_data = results.get("general_feedback", {})
+        section_data = results.get("section_improvements", {})
+        return {
+            "general_feedback": general_data.get("general_feedback", ""),
+            "section_improvements": section_data.get("section_improvements", {}),
+            "additional_sections_needed": section_data.get("additional_sections_needed", [])
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving feedback batch {batch_id}: {e}")
+        return None
+
+# Declarative rules for the rule-based feedback path, in the same shape as
+# script_improver's section rules: (metric, "gt"/"lt", threshold, general
+# feedback sentence, (section_id, improvement text)). Each triggered rule
+# contributes to both general_feedback and section_improvements.
+_FEEDBACK_RULES = (
+    ("repetition_rate", "gt", 0.3,
+     "The agent is repeating information too frequently. ",
+     ("payment_discussion",
+      "Reduce repetition of payment options. Consolidate payment information into clearer, more concise statements.")),
+    ("negotiation_effectiveness", "lt", 0.6,
+     "The agent's negotiation approach needs improvement. ",
+     ("payment_plan",
+      "Include more flexible payment options. Add language that acknowledges customer concerns and offers alternatives based on their situation.")),
+    ("resolution_rate", "lt", 0.5,
+     "Many conversations are ending without a clear resolution. ",
+     ("confirmation",
+      "Strengthen the closing agreement language. Add more direct questions to confirm customer agreement and commitment.")),
+    ("compliance_score", "lt", 0.8,
+     "There are compliance issues in the agent's script. ",
+     ("introduction",
+      "Ensure all compliance elements are present: agent identification, company name, recording disclosure, and purpose of call.")),
+)
+
+# New sections suggested when a metric falls below its threshold
+_ADDITIONAL_SECTION_RULES = (
+    ("negotiation_effectiveness", 0.4, {
+        "name": "Alternative Payment Options",
+        "content": "Let me share some additional payment options that might work better for your situation:\n\n1. Reduced monthly payments over a longer term\n2. Interest-only payments for a limited time\n3. A one-time settlement option\n\nWhich of these might work better for you?"
+    }),
+    ("resolution_rate", 0.3, {
+        "name": "Objection Handling",
+        "content": "I understand your concerns about [specific objection]. Many customers have similar questions.\n\nLet me address this by explaining [explanation addressing objection].\n\nDoes that help clarify the situation?"
+    }),
+)
+
 def _generate_improvement_feedback_rule_based(
-    conversations: List[Conversation], 
+    conversations: List[Conversation],
     metrics: Dict[str, float]
 ) -> Dict[str, Any]:
     """Generate improvement feedback using rule-based approach."""
@@ -450,47 +699,21 @@ def _generate_improvement_feedback_rule_based(
         "additional_sections_needed": [],
         "section_improvements": {}
     }
-    
-    # General feedback based on metrics
-    if metrics["repetition_rate"] > 0.3:
-        feedback["general_feedback"] += "The agent is repeating information too frequently. "
-    
-    if metrics["negotiation_effectiveness"] < 0.6:
-        feedback["general_feedback"] += "The agent's negotiation approach needs improvement. "
-    
-    if metrics["resolution_rate"] < 0.5:
-        feedback["general_feedback"] += "Many conversations are ending without a clear resolution. "
-    
-    if metrics["compliance_score"] < 0.8:
-        feedback["general_feedback"] += "There are compliance issues in the agent's script. "
-    
+
+    for metric_name, direction, threshold, general_text, section in _FEEDBACK_RULES:
+        value = metrics[metric_name]
+        if value > threshold if direction == "gt" else value < threshold:
+            feedback["general_feedback"] += general_text
+            section_id, improvement = section
+            feedback["section_improvements"][section_id] = improvement
+
     if not feedback["general_feedback"]:
         feedback["general_feedback"] = "The agent is performing adequately overall."
-    
-    # Script section improvements
-    if metrics["repetition_rate"] > 0.3:
-        feedback["section_improvements"]["payment_discussion"] = "Reduce repetition of payment options. Consolidate payment information into clearer, more concise statements."
-    
-    if metrics["negotiation_effectiveness"] < 0.6:
-        feedback["section_improvements"]["payment_plan"] = "Include more flexible payment options. Add language that acknowledges customer concerns and offers alternatives based on their situation."
-    
-    if metrics["resolution_rate"] < 0.5:
-        feedback["section_improvements"]["confirmation"] = "Strengthen the closing agreement language. Add more direct questions to confirm customer agreement and commitment."
-    
-    if metrics["compliance_score"] < 0.8:
-        feedback["section_improvements"]["introduction"] = "Ensure all compliance elements are present: agent identification, company name, recording disclosure, and purpose of call."
-    
-    # Suggest additional sections if needed
-    if metrics["negotiation_effectiveness"] < 0.4:
-        feedback["additional_sections_needed"].append({
-            "name": "Alternative Payment Options",
-            "content": "Let me share some additional payment options that might work better for your situation:\n\n1. Reduced monthly payments over a longer term\n2. Interest-only payments for a limited time\n3. A one-time settlement option\n\nWhich of these might work better for you?"
-        })
-    
-    if metrics["resolution_rate"] < 0.3:
-        feedback["additional_sections_needed"].append({
-            "name": "Objection Handling",
-            "content": "I understand your concerns about [specific objection]. Many customers have similar questions.\n\nLet me address this by explaining [explanation addressing objection].\n\nDoes that help clarify the situation?"
-        })
-    
+
+    # Suggest additional sections if needed; copied so later mutation of the
+    # feedback dict cannot touch the rule table
+    for metric_name, threshold, section in _ADDITIONAL_SECTION_RULES:
+        if metrics[metric_name] < threshold:
+            feedback["additional_sections_needed"].append(dict(section))
+
     return feedback 
\ No newline at end of file
@@ -1,14 +1,16 @@
 import os
-import json
+import asyncio
 import logging
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, PrivateAttr
 
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
+_SYSTEM_MESSAGE = "You generate diverse and realistic personas of people who have defaulted on loans. You MUST return valid JSON matching the requested format exactly."
+
 class DebtorPersona(BaseModel):
     """Model representing a loan defaulter persona for testing."""
     id: str
@@ -24,9 +26,16 @@ class DebtorPersona(BaseModel):
     objections: List[str]
     financial_situation: str
     willingness_to_pay: float  # 0.0-1.0 scale
-    
+
+    # Memoized to_prompt output; personas never change after generation, and
+    # the prompt is rebuilt for every simulated customer turn otherwise
+    _prompt_cache: Optional[str] = PrivateAttr(default=None)
+
     def to_prompt(self) -> str:
         """Converts persona to a prompt for customer simulation."""
+        if self._prompt_cache is not None:
+            return self._prompt_cache
+
         persona_description = f"""
         You are role-playing as {self.name}, a {self.age} year old {self.occupation} who is currently 
         {self.months_behind} months behind on a loan payment of ${self.debt_amount:.2f}.
@@ -46,6 +55,7 @@ class DebtorPersona(BaseModel):
         
         Respond as this character would to a debt collection call. Be authentic to this persona.
         """
+        self._prompt_cache = persona_description
         return persona_description
 
 def generate_personas(count: int = 5) -> List[DebtorPersona]:
@@ -66,70 +76,118 @@ def generate_personas(count: int = 5) -> List[DebtorPersona]:
         logger.error(f"Error generating personas: {e}")
         raise ValueError(f"Failed to generate personas: {str(e)}")
 
+class _GeneratedPersona(BaseModel):
+    """DebtorPersona minus the id field, which is assigned locally."""
+    name: str
+    age: int
+    occupation: str
+    income: float
+    debt_amount: float
+    months_behind: int
+    reasons_for_default: List[str]
+    communication_style: str
+    negotiation_style: str
+    objections: List[str]
+    financial_situation: str
+    willingness_to_pay: float
+
+class _PersonaBatch(BaseModel):
+    """Structured-output wrapper for a batch of generated personas."""
+    personas: List[_GeneratedPersona]
+
+def _personas_prompt(count: int) -> str:
+    """Build the persona-generation prompt for a batch of the given size."""
+    return f"""
+    Create {count} realistic personas for loan defaulters that a debt collection agency would call.
+
+    Return a "personas" array of EXACTLY {count} entries. For each persona:
+    - name: A person's full name (string)
+    - age: Age in years (integer between 18-75)
+    - occupation: Current job or profession (string)
+    - income: Monthly income in dollars (float between 1000-10000)
+    - debt_amount: Amount of debt in dollars (float between 1000-20000)
+    - months_behind: Number of months behind on payment (integer between 1-12)
+    - reasons_for_default: List of reasons for defaulting (array of 2-4 strings)
+    - communication_style: How they communicate (string describing their style)
+    - negotiation_style: Their approach to negotiation (string)
+    - objections: Common objections they raise (array of 2-4 strings)
+    - financial_situation: Brief description of their finances (string)
+    - willingness_to_pay: Number between 0.0 and 1.0 (float)
+
+    Be creative and realistic. Generate fully formed characters with believable financial situations.
+    Ensure diverse representation across the personas.
+    """
+
+def _request_personas(client: OpenAI, count: int) -> List[_GeneratedPersona]:
+    """Request a batch of personas from the API in one call."""
+    # One request returns all personas at once, so latency stays at a single
+    # round trip instead of growing linearly with count. Structured outputs
+    # constrain the response to the _PersonaBatch schema, so no hand-rolled
+    # field validation (or retry on malformed JSON) is needed.
+    response = client.beta.chat.completions.parse(
+        model="gpt-4o",
+        response_format=_PersonaBatch,
+        messages=[
+            {"role": "system", "content": _SYSTEM_MESSAGE},
+            {"role": "user", "content": _personas_prompt(count)}
+        ],
+        temperature=0.9
+    )
+
+    parsed = response.choices[0].message.parsed
+    return parsed.personas if parsed else []
+
+async def _request_personas_concurrent(count: int) -> List[Dict[str, Any]]:
+    """
+    Request personas as concurrent single-persona calls.
+
+    Fallback for when the batched request comes back short: the missing
+    slots fan out in parallel, so the top-up still costs one round trip of
+    wall-clock time rather than count sequential ones.
+    """
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    async def _one() -> Optional[_GeneratedPersona]:
+        response = await client.beta.chat.completions.parse(
+            model="gpt-4o",
+            response_format=_PersonaBatch,
+            messages=[
+                {"role": "system", "content": _SYSTEM_MESSAGE},
+                {"role": "user", "content": _personas_prompt(1)}
+            ],
+            temperature=0.9
+        )
+        parsed = response.choices[0].message.parsed
+        return parsed.personas[0] if parsed and parsed.personas else None
+
+    results = await asyncio.gather(*(_one() for _ in range(count)), return_exceptions=True)
+    return [p for p in results if isinstance(p, _GeneratedPersona)]
+
 def generate_personas_with_api(count: int) -> List[DebtorPersona]:
-    """Generate personas using OpenAI API."""
+    """Generate personas using a single batched OpenAI API call."""
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    personas = []
-    for i in range(count):
-        try:
-            prompt = f"""
-            Create a realistic persona for a loan defaulter that a debt collection agency would call.
-            
-            The response MUST be a valid JSON object with EXACTLY these fields:
-            - name: A person's full name (string)
-            - age: Age in years (integer between 18-75)
-            - occupation: Current job or profession (string)
-            - income: Monthly income in dollars (float between 1000-10000)
-            - debt_amount: Amount of debt in dollars (float between 1000-20000)
-            - months_behind: Number of months behind on payment (integer between 1-12)
-            - reasons_for_default: List of reasons for defaulting (array of 2-4 strings)
-            - communication_style: How they communicate (string describing their style)
-            - negotiation_style: Their approach to negotiation (string)
-            - objections: Common objections they raise (array of 2-4 strings)
-            - financial_situation: Brief description of their finances (string)
-            - willingness_to_pay: Number between 0.0 and 1.0 (float)
-            
-            Be creative and realistic. Generate a fully formed character with a believable financial situation.
-            Ensure diverse representation across different personas.
-            """
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": "You generate diverse and realistic personas of people who have defaulted on loans. You MUST return valid JSON matching the requested format exactly."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.9
-            )
-            
-            # Extract and validate the response
-            try:
-                persona_data = json.loads(response.choices[0].message.content)
-                
-                # Check if all required fields are present
-                required_fields = ["name", "age", "occupation", "income", "debt_amount", 
-                                  "months_behind", "reasons_for_default", "communication_style", 
-                                  "negotiation_style", "objections", "financial_situation", 
-                                  "willingness_to_pay"]
-                
-                missing_fields = [field for field in required_fields if field not in persona_data]
-                
-                if missing_fields:
-                    raise ValueError(f"Missing required fields in API response: {', '.join(missing_fields)}")
-                
-                # Ensure ID is unique
-                persona_data["id"] = f"persona_{i+1}"
-                personas.append(DebtorPersona(**persona_data))
-                logger.info(f"Generated persona: {persona_data['name']}")
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON in API response: {e}")
-                raise
-                
-        except Exception as e:
-            logger.error(f"Error generating persona with API: {e}")
-            raise
-    
-    return personas 
\ No newline at end of file
+
+    try:
+        personas_data = _request_personas(client, count)
+
+        if len(personas_data) < count:
+            # Top up only the missing slots, fanned out concurrently,
+            # instead of regenerating the whole batch
+            missing = count - len(personas_data)
+            logger.warning(f"API returned {len(personas_data)} personas, requesting {missing} more")
+            personas_data.extend(asyncio.run(_request_personas_concurrent(missing)))
+
+        if len(personas_data) < count:
+            raise ValueError(f"API returned {len(personas_data)} personas, expected {count}")
+
+        personas = []
+        for i, generated in enumerate(personas_data[:count]):
+            # Ensure ID is unique
+            personas.append(DebtorPersona(id=f"persona_{i+1}", **generated.model_dump()))
+            logger.info(f"Generated persona: {generated.name}")
+
+        return personas
+
+    except Exception as e:
+        logger.error(f"Error generating personas with API: {e}")
+        raise 
\ No newline at end of file
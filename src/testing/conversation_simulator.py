@@ -3,29 +3,84 @@ Conversation simulator for testing debt collection agent scripts with various cu
 """
 
 import os
+import re
 import json
+import time
+import asyncio
+import hashlib
 import logging
 import datetime
+import threading
 from typing import List, Optional, Callable, Dict, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from openai import OpenAI
+import orjson
+from openai import OpenAI, AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """Represents a single message in a conversation."""
-    role: str  # "agent" or "customer" 
+    role: str  # "agent" or "customer"
     content: str
-    timestamp: Optional[str] = None
-    
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.datetime.now().isoformat()
+    # Epoch float: time.time() is a bare clock read, where the old
+    # datetime.now().isoformat() default paid localtime conversion and
+    # string formatting per message. Formatted only at serialization.
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form with the timestamp rendered as ISO-8601."""
+        # Built directly from the attributes; dataclasses.asdict would
+        # deep-copy every field recursively per message
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": datetime.datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+# Directories already created this run: save paths repeat across a
+# sweep, so each one costs a single mkdir instead of a stat per save
+_READY_DIRS: set = set()
+
+def _ensure_dir(directory: Path) -> Path:
+    """Create the directory once per process and remember it."""
+    if directory not in _READY_DIRS:
+        directory.mkdir(parents=True, exist_ok=True)
+        _READY_DIRS.add(directory)
+    return directory
+
+# Content-addressed persona storage: a sweep reuses the same handful of
+# personas across thousands of conversation records, so each one is
+# written once under its content hash and referenced by that hash from
+# the records, instead of re-embedding the full field block every save
+_PERSONA_DIR = Path("data/personas")
+
+def _persist_persona(persona: Any) -> str:
+    """Store the persona once under its content hash and return the ref."""
+    # Hashed per save on purpose: memoizing by object identity went
+    # stale once a persona was garbage-collected and its address
+    # reused, and the blake2b over this small dict is cheap
+    payload = orjson.dumps({
+        "name": persona.name,
+        "age": persona.age,
+        "occupation": persona.occupation,
+        "debt_amount": persona.debt_amount,
+        "months_behind": persona.months_behind,
+        "reasons_for_default": persona.reasons_for_default,
+        "communication_style": persona.communication_style,
+        "willingness_to_pay": persona.willingness_to_pay
+    })
+    ref = hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    path = _ensure_dir(_PERSONA_DIR) / f"{ref}.json"
+    if not path.exists():
+        path.write_bytes(payload)
 
-@dataclass 
+    return ref
+
+@dataclass(slots=True)
 class Conversation:
     """Represents a complete conversation between agent and customer."""
     agent_script: Any  # DebtCollectionScript instance
@@ -33,73 +88,230 @@ class Conversation:
     messages: List[Message]
     start_time: Optional[str] = None
     end_time: Optional[str] = None
-    
+    # Running summary of turns that have left the recent context window,
+    # and how many messages it covers (see _update_summary)
+    summary: Optional[str] = None
+    summarized_upto: int = 0
+    # Chat-format views of the history, one per side: the role mapping
+    # ("agent" is the assistant in its own view, the user in the
+    # customer's) is applied once per message here instead of per turn
+    # in the prompt builders
+    _agent_view: List[Dict[str, str]] = field(default_factory=list)
+    _customer_view: List[Dict[str, str]] = field(default_factory=list)
+
     def __post_init__(self):
         if self.start_time is None:
             self.start_time = datetime.datetime.now().isoformat()
-    
+
     def add_message(self, role: str, content: str):
         """Add a message to the conversation."""
         message = Message(role=role, content=content)
         self.messages.append(message)
-        
+        is_agent = role == "agent"
+        self._agent_view.append(
+            {"role": "assistant" if is_agent else "user", "content": content}
+        )
+        self._customer_view.append(
+            {"role": "user" if is_agent else "assistant", "content": content}
+        )
+
     def finish(self):
         """Mark the conversation as finished."""
         self.end_time = datetime.datetime.now().isoformat()
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable snapshot of the conversation."""
+        return {
+            # Persona stored once under data/personas/<ref>.json and
+            # referenced here by its content hash
+            "customer_persona_ref": _persist_persona(self.customer_persona),
+            "script_version": self.agent_script.version,
+            "messages": [msg.to_dict() for msg in self.messages],
+            "start_time": self.start_time,
+            "end_time": self.end_time
+        }
+
     def save(self, directory: Optional[str] = None) -> str:
         """Save the conversation to a JSON file."""
         if directory is None:
             directory = "data/conversations"
-        
-        # Create directory if it doesn't exist
-        Path(directory).mkdir(parents=True, exist_ok=True)
-        
+
         # Generate filename
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"conversation_{self.customer_persona.name.replace(' ', '_')}_{timestamp}.json"
-        filepath = Path(directory) / filename
-        
-        # Convert to serializable format
-        conversation_data = {
-            "customer_persona": {
-                "name": self.customer_persona.name,
-                "age": self.customer_persona.age,
-                "occupation": self.customer_persona.occupation,
-                "debt_amount": self.customer_persona.debt_amount,
-                "months_behind": self.customer_persona.months_behind,
-                "reasons_for_default": self.customer_persona.reasons_for_default,
-                "communication_style": self.customer_persona.communication_style,
-                "willingness_to_pay": self.customer_persona.willingness_to_pay
-            },
-            "script_version": self.agent_script.version,
-            "messages": [asdict(msg) for msg in self.messages],
-            "start_time": self.start_time,
-            "end_time": self.end_time
-        }
-        
-        # Save to file
-        with open(filepath, 'w') as f:
-            json.dump(conversation_data, f, indent=2)
-        
+        filepath = _ensure_dir(Path(directory)) / filename
+
+        # Serialize in one C-level pass and write the bytes in one call.
+        # Compact (unindented) JSON: these files are archival, and indent
+        # whitespace roughly doubled their size across a large sweep
+        filepath.write_bytes(orjson.dumps(self.to_dict()))
+
         logger.info(f"Conversation saved to {filepath}")
         return str(filepath)
 
+class ConversationLogger:
+    """
+    Append-only JSONL sink for completed conversations.
+
+    One shared handle replaces a file per conversation, so a sweep pays a
+    single open instead of open/close per save, and downstream tools can
+    tail the log while the sweep is still running.
+    """
+
+    def __init__(self, filepath: Optional[str] = None):
+        if filepath is None:
+            filepath = "data/conversations.jsonl"
+        self.filepath = Path(filepath)
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.filepath, "ab")
+        # The simulations run from worker threads, so appends serialize
+        # through a lock to keep lines whole
+        self._lock = threading.Lock()
+
+    def append(self, conversation: Conversation) -> None:
+        """Append one conversation as a JSONL row and flush it."""
+        line = orjson.dumps(conversation.to_dict()) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the underlying file handle."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+def save_batch(conversations: List[Conversation], directory: Optional[str] = None) -> str:
+    """
+    Save a whole iteration's conversations to a single Parquet file.
+
+    One columnar write replaces N small JSON writes, so iterating with many
+    personas doesn't litter the data directory with per-conversation files.
+
+    Args:
+        conversations: The conversations to persist
+        directory: Target directory (defaults to data/conversations)
+
+    Returns:
+        Path of the written Parquet file
+    """
+    import pandas as pd
+
+    if directory is None:
+        directory = "data/conversations"
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = _ensure_dir(Path(directory)) / f"conversations_{timestamp}.parquet"
+
+    # Flatten each conversation into one row; messages are kept as a JSON
+    # string column since they are ragged
+    rows = []
+    for conversation in conversations:
+        persona = conversation.customer_persona
+        rows.append({
+            "persona_name": persona.name,
+            "persona_age": persona.age,
+            "persona_occupation": persona.occupation,
+            "debt_amount": persona.debt_amount,
+            "months_behind": persona.months_behind,
+            "willingness_to_pay": persona.willingness_to_pay,
+            "script_version": conversation.agent_script.version,
+            "messages": json.dumps([msg.to_dict() for msg in conversation.messages]),
+            "start_time": conversation.start_time,
+            "end_time": conversation.end_time
+        })
+
+    df = pd.DataFrame(rows)
+    df.to_parquet(filepath, compression="zstd")
+
+    logger.info(f"Saved {len(conversations)} conversations to {filepath}")
+    return str(filepath)
+
+# Shared API clients: constructing a client per conversation built a new
+# HTTP connection pool each time, paying a TLS handshake on the first
+# request of every conversation. One client keeps the keep-alive pool
+# warm across conversations and across a batch.
+_CLIENT: Optional[OpenAI] = None
+_CLIENT_API_KEY: Optional[str] = None
+_ASYNC_CLIENT: Optional[AsyncOpenAI] = None
+_ASYNC_CLIENT_API_KEY: Optional[str] = None
+_ASYNC_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+# The SDK retries rate limits, timeouts and connection errors internally
+# with exponential backoff and jitter; 5 attempts rides out most
+# transient 429/5xx bursts during a concurrent sweep
+_MAX_RETRIES = 5
+
+def _get_client() -> OpenAI:
+    """Return the cached sync client, rebuilding it only if the key changed."""
+    global _CLIENT, _CLIENT_API_KEY
+    # The Streamlit sidebar can set/rotate OPENAI_API_KEY mid-session,
+    # so the cached client is tied to the key it was built with
+    api_key = os.getenv("OPENAI_API_KEY")
+    if _CLIENT is None or _CLIENT_API_KEY != api_key:
+        _CLIENT = OpenAI(api_key=api_key, max_retries=_MAX_RETRIES)
+        _CLIENT_API_KEY = api_key
+    return _CLIENT
+
+def _get_async_client() -> AsyncOpenAI:
+    """
+    Return the shared async client for the running event loop.
+
+    The underlying connection pool is bound to the loop it first runs on,
+    so a fresh client is built whenever a new loop starts (e.g. each
+    asyncio.run of a batch) or the API key changes; within a loop all
+    conversations share it.
+    """
+    global _ASYNC_CLIENT, _ASYNC_CLIENT_API_KEY, _ASYNC_CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT_LOOP is not loop or _ASYNC_CLIENT_API_KEY != api_key:
+        _ASYNC_CLIENT = AsyncOpenAI(api_key=api_key, max_retries=_MAX_RETRIES)
+        _ASYNC_CLIENT_API_KEY = api_key
+        _ASYNC_CLIENT_LOOP = loop
+    return _ASYNC_CLIENT
+
+# Script placeholders substituted into the opening message, matched in a
+# single pass instead of one str.replace scan per placeholder
+_PLACEHOLDER_RE = re.compile(r"\[(Agent Name|Customer Name|Last 4 Digits|Amount|X)\]")
+
+def _first_agent_message(agent_script: Any, customer_persona: Any) -> str:
+    """Build the opening agent message from the script's starting section."""
+    starting_section = agent_script.get_starting_section()
+    if not starting_section:
+        return f"Hello {customer_persona.name}, this is regarding your past-due account of ${customer_persona.debt_amount:.2f}."
+
+    # Replace placeholders with persona data
+    repl = {
+        "Agent Name": "AI Agent",
+        "Customer Name": customer_persona.name,
+        "Last 4 Digits": "1234",
+        "Amount": f"{customer_persona.debt_amount:.2f}",
+        "X": str(customer_persona.months_behind)
+    }
+    return _PLACEHOLDER_RE.sub(lambda m: repl[m.group(1)], starting_section.content)
+
 def simulate_conversation(
     agent_script: Any,
-    customer_persona: Any, 
+    customer_persona: Any,
     max_turns: int = 10,
-    message_callback: Optional[Callable[[str, str], None]] = None
+    message_callback: Optional[Callable[[str, str], None]] = None,
+    customer_model: str = "gpt-4o-mini",
+    agent_model: str = "gpt-4o"
 ) -> Conversation:
     """
     Simulate a conversation between the debt collection agent and a customer persona.
-    
+
     Args:
         agent_script: The agent script to use
         customer_persona: The customer persona to simulate
         max_turns: Maximum number of conversation turns
         message_callback: Optional callback function called for each message (role, content)
-        
+        customer_model: Model for customer turns. The persona roleplay is
+            the easier side, so it defaults to the cheaper gpt-4o-mini;
+            override for A/B quality checks.
+        agent_model: Model for agent turns (the behavior under test)
+
     Returns:
         Conversation object containing the full interaction
     """
@@ -121,21 +333,18 @@ def simulate_conversation(
         return conversation
     
     try:
-        client = OpenAI(api_key=api_key)
-        
-        # Get the starting section of the agent script
-        starting_section = agent_script.get_starting_section()
-        if starting_section:
-            first_message = starting_section.content
-            # Replace placeholders with persona data
-            first_message = first_message.replace("[Agent Name]", "AI Agent")
-            first_message = first_message.replace("[Customer Name]", customer_persona.name)
-            first_message = first_message.replace("[Last 4 Digits]", "1234")
-            first_message = first_message.replace("[Amount]", f"{customer_persona.debt_amount:.2f}")
-            first_message = first_message.replace("[X]", str(customer_persona.months_behind))
-        else:
-            first_message = f"Hello {customer_persona.name}, this is regarding your past-due account of ${customer_persona.debt_amount:.2f}."
-        
+        client = _get_client()
+
+        # Frozen per-conversation system prompts: keeping the long prefix
+        # byte-identical across turns (with constant sampling params) lets
+        # OpenAI's automatic prompt caching serve it after the first turn,
+        # and means agent_script.to_prompt() and the persona interpolation
+        # run once per conversation instead of once per turn
+        customer_system_prompt = _customer_system_prompt(customer_persona)
+        agent_system_prompt = _agent_system_prompt(agent_script, customer_persona)
+
+        first_message = _first_agent_message(agent_script, customer_persona)
+
         # Add the first agent message
         conversation.add_message("agent", first_message)
         if message_callback:
@@ -143,23 +352,31 @@ def simulate_conversation(
         
         # Simulate the conversation turns
         for turn in range(max_turns):
+            # Fold aged-out turns into the running summary so the prompt
+            # only carries the summary plus the recent window
+            _update_summary(client, conversation)
+
             # Generate customer response
             customer_response = _generate_customer_response(
-                client, customer_persona, conversation.messages
+                client, customer_system_prompt,
+                conversation._customer_view[conversation.summarized_upto:],
+                conversation.summary, customer_model
             )
-            
+
             if customer_response:
                 conversation.add_message("customer", customer_response)
                 if message_callback:
                     message_callback("customer", customer_response)
-                    
+
                 # Check if conversation should end
                 if _should_end_conversation(customer_response, turn, max_turns):
                     break
-                
+
                 # Generate agent response
                 agent_response = _generate_agent_response(
-                    client, agent_script, customer_persona, conversation.messages
+                    client, agent_system_prompt,
+                    conversation._agent_view[conversation.summarized_upto:],
+                    conversation.summary, agent_model
                 )
                 
                 if agent_response:
@@ -183,15 +400,276 @@ def simulate_conversation(
     
     return conversation
 
-def _generate_customer_response(
-    client: OpenAI,
+async def simulate_conversation_async(
+    agent_script: Any,
     customer_persona: Any,
-    conversation_history: List[Message]
+    max_turns: int = 10,
+    message_callback: Optional[Callable[[str, str], None]] = None,
+    customer_model: str = "gpt-4o-mini",
+    agent_model: str = "gpt-4o"
+) -> Conversation:
+    """
+    Async variant of simulate_conversation for running multiple personas concurrently.
+
+    Uses AsyncOpenAI so that several conversations can be awaited at once
+    (e.g. via asyncio.gather), turning N sequential conversations into
+    roughly the latency of the slowest one.
+
+    Args:
+        agent_script: The agent script to use
+        customer_persona: The customer persona to simulate
+        max_turns: Maximum number of conversation turns
+        message_callback: Optional callback function called for each message (role, content).
+            Must be thread-safe (e.g. push into a queue) - it may run off the main thread.
+        customer_model: Model for customer turns (see simulate_conversation)
+        agent_model: Model for agent turns (the behavior under test)
+
+    Returns:
+        Conversation object containing the full interaction
+    """
+    # Initialize conversation
+    conversation = Conversation(
+        agent_script=agent_script,
+        customer_persona=customer_persona,
+        messages=[]
+    )
+
+    # Check if OpenAI API key is available
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.error("OpenAI API key not found. Cannot simulate conversation.")
+        # Return a dummy conversation for testing
+        conversation.add_message("agent", "Hello, this is a debt collection agent.")
+        conversation.add_message("customer", "I can't pay right now.")
+        conversation.finish()
+        return conversation
+
+    try:
+        client = _get_async_client()
+
+        # Frozen per-conversation system prompts (see simulate_conversation)
+        customer_system_prompt = _customer_system_prompt(customer_persona)
+        agent_system_prompt = _agent_system_prompt(agent_script, customer_persona)
+
+        first_message = _first_agent_message(agent_script, customer_persona)
+
+        # Add the first agent message
+        conversation.add_message("agent", first_message)
+        if message_callback:
+            message_callback("agent", first_message)
+
+        # Simulate the conversation turns
+        for turn in range(max_turns):
+            # Fold aged-out turns into the running summary so the prompt
+            # only carries the summary plus the recent window
+            await _update_summary_async(client, conversation)
+
+            # Generate customer response
+            customer_response = await _generate_customer_response_async(
+                client, customer_system_prompt,
+                conversation._customer_view[conversation.summarized_upto:],
+                conversation.summary, customer_model
+            )
+
+            if customer_response:
+                conversation.add_message("customer", customer_response)
+                if message_callback:
+                    message_callback("customer", customer_response)
+
+                # Check if conversation should end
+                if _should_end_conversation(customer_response, turn, max_turns):
+                    break
+
+                # Generate agent response
+                agent_response = await _generate_agent_response_async(
+                    client, agent_system_prompt,
+                    conversation._agent_view[conversation.summarized_upto:],
+                    conversation.summary, agent_model
+                )
+
+                if agent_response:
+                    conversation.add_message("agent", agent_response)
+                    if message_callback:
+                        message_callback("agent", agent_response)
+
+                    # Check if conversation should end
+                    if _should_end_conversation(agent_response, turn, max_turns):
+                        break
+            else:
+                break
+
+        conversation.finish()
+
+    except Exception as e:
+        logger.error(f"Error during conversation simulation: {str(e)}")
+        # Add an error message to the conversation
+        conversation.add_message("system", f"Simulation error: {str(e)}")
+        conversation.finish()
+
+    return conversation
+
+async def simulate_batch(
+    pairs: List[tuple],
+    max_turns: int = 10,
+    max_concurrent: int = 8,
+    message_callback: Optional[Callable[[str, str], None]] = None
+) -> List[Conversation]:
+    """
+    Run several simulated conversations concurrently.
+
+    Each pair is (agent_script, customer_persona). A shared semaphore caps
+    how many conversations are in flight at once so a sweep stays within
+    API rate limits while still overlapping the network latency, bringing
+    the wall-clock cost close to that of the slowest single conversation.
+
+    Args:
+        pairs: (agent_script, customer_persona) tuples to simulate
+        max_turns: Maximum number of conversation turns per conversation
+        max_concurrent: Maximum conversations in flight at once
+        message_callback: Optional callback for each message (role, content).
+            Must be thread-safe - it may run off the main thread.
+
+    Returns:
+        List of Conversation objects, in the order of pairs
+    """
+    # Turns within one conversation stay strictly sequential: each prompt
+    # embeds the reply that precedes it, so a customer turn pre-generated
+    # speculatively while the agent call is in flight could never match
+    # the real history and would just be a discarded paid completion.
+    # Cross-conversation concurrency below fills the latency instead.
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run_one(agent_script: Any, customer_persona: Any) -> Conversation:
+        async with semaphore:
+            return await simulate_conversation_async(
+                agent_script=agent_script,
+                customer_persona=customer_persona,
+                max_turns=max_turns,
+                message_callback=message_callback
+            )
+
+    return list(await asyncio.gather(*(run_one(s, p) for s, p in pairs)))
+
+# Context-window management: only the most recent messages go to the API
+# verbatim; older turns are folded into a short summary, so per-turn input
+# tokens grow with the window size rather than the whole conversation.
+# Aged turns accumulate until _SUMMARY_BATCH of them are pending, so the
+# summarizer fires every few turns instead of adding a blocking round
+# trip to every turn past the window
+_RECENT_MESSAGES = 8
+_SUMMARY_BATCH = 4
+_SUMMARY_MODEL = "gpt-4o-mini"
+
+def _summary_request(conversation: "Conversation", cutoff: int) -> List[Dict[str, str]]:
+    """Build the messages for folding aged turns into the running summary."""
+    aged = conversation.messages[conversation.summarized_upto:cutoff]
+    transcript = "\n".join(f"{m.role}: {m.content}" for m in aged)
+
+    parts = []
+    if conversation.summary:
+        parts.append(f"Existing summary:\n{conversation.summary}")
+    parts.append(f"New turns:\n{transcript}")
+
+    return [
+        {"role": "system", "content": "You summarize debt collection calls accurately and concisely."},
+        {"role": "user", "content": (
+            "Update the summary of this debt collection conversation in at most 150 words. "
+            "Keep all amounts, commitments, objections, and agreed next steps.\n\n"
+            + "\n\n".join(parts)
+        )}
+    ]
+
+def _update_summary(client: OpenAI, conversation: "Conversation") -> None:
+    """Fold turns that left the recent window into conversation.summary."""
+    cutoff = len(conversation.messages) - _RECENT_MESSAGES
+    if cutoff - conversation.summarized_upto < _SUMMARY_BATCH:
+        return
+
+    # Cached like the turn generators: the request messages embed the
+    # prior summary and the aged slice, so a warm replay reuses the
+    # stored summary instead of re-calling the API - which also keeps
+    # the summary text (hashed into downstream turn cache keys)
+    # deterministic across replays
+    messages = _summary_request(conversation, cutoff)
+    cache_key = _response_cache_key(_SUMMARY_MODEL, 0.0, "", messages)
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        conversation.summary = cached
+        conversation.summarized_upto = cutoff
+        return
+
+    try:
+        response = client.chat.completions.create(
+            model=_SUMMARY_MODEL,
+            messages=messages,
+            temperature=0.0,
+            max_tokens=200
+        )
+        conversation.summary = _cache_response(cache_key, response.choices[0].message.content.strip())
+        conversation.summarized_upto = cutoff
+    except Exception as e:
+        # On failure the aged turns simply stay in the window
+        logger.error(f"Error summarizing conversation history: {e}")
+
+async def _update_summary_async(client: AsyncOpenAI, conversation: "Conversation") -> None:
+    """Async counterpart of _update_summary."""
+    cutoff = len(conversation.messages) - _RECENT_MESSAGES
+    if cutoff - conversation.summarized_upto < _SUMMARY_BATCH:
+        return
+
+    messages = _summary_request(conversation, cutoff)
+    cache_key = _response_cache_key(_SUMMARY_MODEL, 0.0, "", messages)
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        conversation.summary = cached
+        conversation.summarized_upto = cutoff
+        return
+
+    try:
+        response = await client.chat.completions.create(
+            model=_SUMMARY_MODEL,
+            messages=messages,
+            temperature=0.0,
+            max_tokens=200
+        )
+        conversation.summary = _cache_response(cache_key, response.choices[0].message.content.strip())
+        conversation.summarized_upto = cutoff
+    except Exception as e:
+        logger.error(f"Error summarizing conversation history: {e}")
+
+# Exact-match response cache shared by the response generators. Reruns of a
+# sweep (or retries after a partial failure) replay identical prompt
+# prefixes, and those turns resolve locally instead of burning another API
+# call. Exact keys only: a semantic (embedding) cache would add a vector
+# store dependency and, at the temperatures used here, returning
+# near-matches would flatten the variety the simulations exist to produce.
+_RESPONSE_CACHE: Dict[str, str] = {}
+_RESPONSE_CACHE_MAX = 1024
+
+def _response_cache_key(
+    model: str,
+    temperature: float,
+    system_prompt: str,
+    history: List[Dict[str, str]]
 ) -> str:
-    """Generate a customer response based on their persona and conversation history."""
-    
-    # Build conversation context for the customer
-    system_prompt = f"""You are roleplaying as a customer with debt who is being contacted by a debt collection agent.
+    """Hash the full request-determining state into a cache key."""
+    hasher = hashlib.sha256(f"{model}|{temperature}".encode("utf-8"))
+    hasher.update(system_prompt.encode("utf-8"))
+    for msg in history:
+        hasher.update(b"\x00")
+        hasher.update(msg["role"].encode("utf-8"))
+        hasher.update(msg["content"].encode("utf-8"))
+    return hasher.hexdigest()
+
+def _cache_response(key: str, content: str) -> str:
+    """Store a generated response under its key, bounding the cache size."""
+    if len(_RESPONSE_CACHE) < _RESPONSE_CACHE_MAX:
+        _RESPONSE_CACHE[key] = content
+    return content
+
+def _customer_system_prompt(customer_persona: Any) -> str:
+    """Build the static customer-side system prompt for one conversation."""
+    return f"""You are roleplaying as a customer with debt who is being contacted by a debt collection agent.
 
 Customer Profile:
 - Name: {customer_persona.name}
@@ -204,40 +682,125 @@ Customer Profile:
 - Willingness to Pay: {customer_persona.willingness_to_pay:.1%}
 
 Stay in character as this customer. Respond naturally based on your financial situation, personality, and willingness to pay. Be realistic about your objections and concerns. Do not reveal internal details about your willingness to pay percentage - let this influence your responses naturally."""
-    
-    # Build message history
+
+def _build_chat_messages(
+    system_prompt: str,
+    history: List[Dict[str, str]],
+    summary: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """
+    Build the chat message list for one generation call.
+
+    The history is a role-mapped view maintained by Conversation, so no
+    per-message dict construction or role branching happens here.
+    """
     messages = [{"role": "system", "content": system_prompt}]
-    
-    for msg in conversation_history:
-        if msg.role == "agent":
-            messages.append({"role": "user", "content": msg.content})
-        else:  # customer message
-            messages.append({"role": "assistant", "content": msg.content})
-    
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the conversation so far: {summary}"})
+    messages.extend(history)
+    return messages
+
+def _generate_customer_response(
+    client: OpenAI,
+    system_prompt: str,
+    history: List[Dict[str, str]],
+    summary: Optional[str] = None,
+    model: str = "gpt-4o-mini"
+) -> str:
+    """Generate a customer response based on their persona and conversation history."""
+    cache_key = _response_cache_key(
+        model, 0.8, f"{system_prompt}\x00{summary or ''}", history
+    )
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    messages = _build_chat_messages(system_prompt, history, summary)
+
     try:
         response = client.chat.completions.create(
-            model="gpt-4o",
+            model=model,
             messages=messages,
             temperature=0.8,
-            max_tokens=150
+            max_tokens=100
         )
-        
-        return response.choices[0].message.content.strip()
-    
+
+        return _cache_response(cache_key, response.choices[0].message.content.strip())
+
     except Exception as e:
+        # Transient errors were already retried by the client; whatever
+        # reaches here is real, and substituting canned dialogue would
+        # silently poison the evaluation data
         logger.error(f"Error generating customer response: {e}")
-        return "I need some time to think about this."
+        raise
 
-def _generate_agent_response(
-    client: OpenAI,
-    agent_script: Any,
-    customer_persona: Any,
-    conversation_history: List[Message]
+async def _stream_completion_async(
+    client: AsyncOpenAI,
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: int
 ) -> str:
-    """Generate an agent response following the script and responding to customer."""
-    
-    # Build system prompt for the agent
-    system_prompt = f"""You are a professional debt collection agent following a script. Your goal is to collect payment while maintaining compliance and professionalism.
+    """
+    Stream a completion, cutting generation short once an end phrase appears.
+
+    A turn that contains an end phrase terminates the conversation anyway,
+    so any tokens generated after it are pure latency. The detector runs on
+    a rolling 64-char tail of the stream so phrases split across deltas are
+    still caught.
+    """
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True
+    )
+
+    parts = []
+    tail = ""
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        parts.append(delta)
+        tail = (tail + delta)[-64:]
+        if _END_PATTERN.search(tail):
+            await stream.close()
+            break
+
+    return "".join(parts).strip()
+
+async def _generate_customer_response_async(
+    client: AsyncOpenAI,
+    system_prompt: str,
+    history: List[Dict[str, str]],
+    summary: Optional[str] = None,
+    model: str = "gpt-4o-mini"
+) -> str:
+    """Async counterpart of _generate_customer_response."""
+    cache_key = _response_cache_key(
+        model, 0.8, f"{system_prompt}\x00{summary or ''}", history
+    )
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    messages = _build_chat_messages(system_prompt, history, summary)
+
+    try:
+        content = await _stream_completion_async(client, messages, model, temperature=0.8, max_tokens=100)
+        return _cache_response(cache_key, content)
+
+    except Exception as e:
+        # See _generate_customer_response: retries are exhausted, so
+        # propagate rather than inject canned dialogue
+        logger.error(f"Error generating customer response: {e}")
+        raise
+
+def _agent_system_prompt(agent_script: Any, customer_persona: Any) -> str:
+    """Build the static agent-side system prompt for one conversation."""
+    return f"""You are a professional debt collection agent following a script. Your goal is to collect payment while maintaining compliance and professionalism.
 
 Agent Script: {agent_script.to_prompt()}
 
@@ -246,49 +809,86 @@ Customer Information (for context only - do not reveal directly):
 - Months Behind: {customer_persona.months_behind}
 
 Follow your script sections appropriately based on the customer's responses. Be professional, empathetic, and focused on finding a resolution. Adapt your script to the conversation flow while staying compliant with debt collection regulations."""
-    
-    # Build message history from agent perspective
-    messages = [{"role": "system", "content": system_prompt}]
-    
-    for msg in conversation_history:
-        if msg.role == "agent":
-            messages.append({"role": "assistant", "content": msg.content})
-        else:  # customer message  
-            messages.append({"role": "user", "content": msg.content})
-    
+
+def _generate_agent_response(
+    client: OpenAI,
+    system_prompt: str,
+    history: List[Dict[str, str]],
+    summary: Optional[str] = None,
+    model: str = "gpt-4o"
+) -> str:
+    """Generate an agent response following the script and responding to customer."""
+    cache_key = _response_cache_key(
+        model, 0.7, f"{system_prompt}\x00{summary or ''}", history
+    )
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    messages = _build_chat_messages(system_prompt, history, summary)
+
     try:
         response = client.chat.completions.create(
-            model="gpt-4o",
+            model=model,
             messages=messages,
             temperature=0.7,
             max_tokens=200
         )
-        
-        return response.choices[0].message.content.strip()
-    
+
+        return _cache_response(cache_key, response.choices[0].message.content.strip())
+
     except Exception as e:
+        # See _generate_customer_response: retries are exhausted, so
+        # propagate rather than inject canned dialogue
         logger.error(f"Error generating agent response: {e}")
-        return "I understand your situation. Let me see what options we have available."
+        raise
+
+async def _generate_agent_response_async(
+    client: AsyncOpenAI,
+    system_prompt: str,
+    history: List[Dict[str, str]],
+    summary: Optional[str] = None,
+    model: str = "gpt-4o"
+) -> str:
+    """Async counterpart of _generate_agent_response."""
+    cache_key = _response_cache_key(
+        model, 0.7, f"{system_prompt}\x00{summary or ''}", history
+    )
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    messages = _build_chat_messages(system_prompt, history, summary)
+
+    try:
+        content = await _stream_completion_async(client, messages, model, temperature=0.7, max_tokens=200)
+        return _cache_response(cache_key, content)
+
+    except Exception as e:
+        # See _generate_customer_response: retries are exhausted, so
+        # propagate rather than inject canned dialogue
+        logger.error(f"Error generating agent response: {e}")
+        raise
+
+# End conversation indicators, compiled into one alternation so each message
+# is scanned once in C (case-insensitively) instead of ~15 substring passes
+_END_PHRASES = (
+    "goodbye", "bye", "talk later", "call back", "hang up",
+    "not interested", "stop calling", "remove me", "don't call",
+    "attorney", "lawyer", "legal", "harassment",
+    "agreed", "deal", "payment arrangement", "will pay"
+)
+_END_PATTERN = re.compile("|".join(re.escape(p) for p in _END_PHRASES), re.IGNORECASE)
 
 def _should_end_conversation(message: str, turn: int, max_turns: int) -> bool:
     """Determine if the conversation should end based on the message content."""
-    
-    # End conversation indicators
-    end_phrases = [
-        "goodbye", "bye", "talk later", "call back", "hang up",
-        "not interested", "stop calling", "remove me", "don't call",
-        "attorney", "lawyer", "legal", "harassment", 
-        "agreed", "deal", "payment arrangement", "will pay"
-    ]
-    
-    message_lower = message.lower()
-    
+
     # Check for explicit end phrases
-    if any(phrase in message_lower for phrase in end_phrases):
+    if _END_PATTERN.search(message):
         return True
-    
+
     # End if we've reached max turns
     if turn >= max_turns - 1:
         return True
-    
-    return False 
\ No newline at end of file
+
+    return False
\ No newline at end of file